@@ -105,6 +105,21 @@ function authHeaders(token?: string): Record<string, string> {
   return t ? { Authorization: `Token ${t}` } : {};
 }
 
+// Follow cursor pagination `next` links until every page has been collected
+async function fetchAllPages(url: string, headers: Record<string,string>): Promise<any[] | null> {
+  const items: any[] = [];
+  let next: string | null = url;
+  while (next) {
+    const res = await fetch(next, { headers });
+    if (!res.ok) return null;
+    const data: any = await res.json();
+    if (Array.isArray(data)) return data;
+    items.push(...(data.results ?? []));
+    next = data.next ?? null;
+  }
+  return items;
+}
+
 async function safeJson(res: Response) {
   const text = await res.text();
   try {
@@ -184,11 +199,10 @@ export const useStore = create<AppState>((set, get) => {
 
     fetchEvents: async () => {
       const headers: Record<string,string> = { 'Content-Type': 'application/json', ...authHeaders(get().token ?? undefined) };
-      const res = await fetch(`${API_BASE}/events/`, { headers });
-      if (!res.ok) {
+      const data = await fetchAllPages(`${API_BASE}/events/`, headers);
+      if (!data) {
         return;
       }
-      const data: any[] = await res.json();
       const events = data.map(normalizeEvent);
       const participantsMap: Record<string, Participant[]> = {};
       events.forEach((e) => {
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, Participant, UserProfile
+from .models import Event, Participant, UserProfile, Job, AttendanceLog, EventCounter, EvaluationTally, EventRollup
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -11,8 +11,40 @@ class ParticipantAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'event', 'status')
 
 
+@admin.register(EventCounter)
+class EventCounterAdmin(admin.ModelAdmin):
+    list_display = ('event', 'name', 'value')
+    list_filter = ('name',)
+
+
+@admin.register(EvaluationTally)
+class EvaluationTallyAdmin(admin.ModelAdmin):
+    list_display = ('event', 'question', 'answer', 'count')
+    list_filter = ('question',)
+
+
+@admin.register(EventRollup)
+class EventRollupAdmin(admin.ModelAdmin):
+    list_display = ('event', 'date', 'location', 'registrations', 'attended', 'certificates', 'stale')
+    list_filter = ('stale',)
+
+
+@admin.register(AttendanceLog)
+class AttendanceLogAdmin(admin.ModelAdmin):
+    list_display = ('participant', 'event', 'type', 'time', 'session', 'device_id')
+    list_filter = ('type',)
+    raw_id_fields = ('event', 'participant', 'session')
+
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'qr_code', 'created_at')
     search_fields = ('user__email', 'user__username', 'qr_code')
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'run_after', 'created_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('created_at', 'updated_at', 'finished_at')
@@ -0,0 +1,131 @@
+"""
+Response cache for public, read-heavy endpoints (event detail, certificate verification).
+
+Entries live in Django's cache framework (CACHES['default']: local memory
+unless CACHE_BACKEND points elsewhere). Every event has a stamp, the time it
+last changed; cached representations are tied to the stamp they were built
+under, so moving it with touch_event() drops all of them at once. The
+receivers below touch the stamp on model saves and deletes, and bulk writes
+that skip signals (batch check-in, imports, issuance) call touch_event()
+themselves. The stamp also supplies the ETag and Last-Modified headers.
+
+The local-memory backend is per process, so other workers only notice a
+change when their entries expire after RESPONSE_CACHE_TTL seconds; use a
+shared backend (Redis, Memcached) when running several workers.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import AttendanceLog, Certificate, EvaluationQuestion, Event, EventSession, Participant, Quiz
+
+
+def _stamp_key(event_id):
+    return f'event-stamp:{event_id}'
+
+
+def event_stamp(event_id):
+    """When the event last changed, as far as the cache knows"""
+    key = _stamp_key(event_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time(), None)
+        stamp = cache.get(key) or time.time()
+    return stamp
+
+
+def touch_event(event_id):
+    """Invalidate every cached representation of the event once the transaction commits"""
+    transaction.on_commit(lambda: cache.set(_stamp_key(event_id), time.time(), None))
+
+
+def _verify_key(code):
+    return f'verify:{hashlib.sha256(code.encode()).hexdigest()}'  # Codes are user input
+
+
+def _etag(key, stamp):
+    return '"%s"' % hashlib.sha256(f'{key}:{stamp!r}'.encode()).hexdigest()[:32]
+
+
+def _conditional(request, data, key, stamp, cache_control):
+    """200 with validators, or 304 when the client's copy is still current"""
+    response = Response(data)
+    response['ETag'] = _etag(key, stamp)
+    response['Last-Modified'] = http_date(stamp)
+    response['Cache-Control'] = cache_control
+    return get_conditional_response(request, etag=response['ETag'], last_modified=int(stamp), response=response)
+
+
+def event_response(request, event_id, variant, build):
+    """Cached `build()` data for one representation of an event
+
+    Representations depend on who is asking, so responses are private to the client.
+    """
+    stamp = event_stamp(event_id)
+    key = f'event:{event_id}:{variant}'
+    entry_key = f'{key}:{stamp!r}'
+    data = cache.get(entry_key)
+    if data is None:
+        data = build()
+        cache.set(entry_key, data, settings.RESPONSE_CACHE_TTL)
+    return _conditional(request, data, key, stamp, 'private, no-cache')
+
+
+def verification_response(request, code, build):
+    """Cached verification result; `build()` returns (event_id, data), event_id None if invalid
+
+    Invalid codes are not cached, so a certificate issued later verifies at once.
+    """
+    key = _verify_key(code)
+    entry = cache.get(key)
+    if entry is None or entry['stamp'] != event_stamp(entry['event_id']):
+        event_id, data = build()
+        if event_id is None:
+            return Response(data)
+        entry = {'event_id': event_id, 'stamp': event_stamp(event_id), 'data': data}
+        cache.set(key, entry, settings.RESPONSE_CACHE_TTL)
+    return _conditional(request, entry['data'], key, entry['stamp'], 'public, no-cache')
+
+
+def _deleting_event(origin):
+    """Cascades from an event delete are covered by the event's own receiver"""
+    return isinstance(origin, Event) or getattr(origin, 'model', None) is Event
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def _event_changed(sender, instance, **kwargs):
+    touch_event(instance.pk)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+@receiver(post_save, sender=AttendanceLog)
+@receiver(post_save, sender=EventSession)
+@receiver(post_delete, sender=EventSession)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=EvaluationQuestion)
+@receiver(post_delete, sender=EvaluationQuestion)
+def _event_part_changed(sender, instance, origin=None, **kwargs):
+    if not _deleting_event(origin):
+        touch_event(instance.event_id)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def _certificate_changed(sender, instance, origin=None, **kwargs):
+    if _deleting_event(origin):
+        return
+    event_id = Participant.objects.filter(pk=instance.participant_id).values_list('event_id', flat=True).first()
+    if event_id is not None:
+        touch_event(event_id)
+    cache.delete(_verify_key(instance.verification_code))
@@ -0,0 +1,414 @@
+"""
+Fast path for QR check-in at the door.
+
+Each scanned event gets an in-memory index mapping user QR codes to the
+holder's participant row, so a scan of a registered attendee is resolved
+without touching UserProfile or Participant lookups and is recorded with a
+single UPDATE plus an AttendanceLog insert. The index also remembers each
+participant's status, so the UPDATE can be conditional on it and the event
+counters move exactly once. Unknown codes (walk-ins) fall back to the
+database and are added to the index.
+
+Indexes are kept current by the signal receivers below and expire after
+CHECKIN_INDEX_TTL seconds, which bounds staleness from changes made in
+other processes. Receivers only matter in a process that has imported this
+module, which is also the only place an index can exist.
+
+Kiosks that scanned offline sync through check_in_batch(), which resolves a
+whole queue of scans with set-based queries in one transaction.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import touch_event
+from .models import AttendanceLog, Event, EventCounter, EventRollup, Participant, UserProfile
+
+CodeEntry = namedtuple('CodeEntry', ['user_id', 'participant_id', 'name', 'status'])
+CheckIn = namedtuple('CheckIn', ['participant_id', 'user_id', 'name', 'status', 'check_in_time', 'created'])
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # event_id -> EventCodeIndex, least recently used first
+
+
+class EventCodeIndex:
+    """QR code -> CodeEntry for the participants of one event"""
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.codes = {}
+        self.by_participant = {}  # participant_id -> qr code
+        self.by_user = {}  # user_id -> qr code
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, event_id):
+        index = cls(event_id)
+        rows = (
+            Participant.objects.filter(event_id=event_id, user__profile__qr_code__isnull=False)
+            .order_by('-id')  # Lowest id wins if a user was registered twice
+            .values_list('user__profile__qr_code', 'user_id', 'id', 'name', 'status')
+        )
+        for code, user_id, participant_id, name, status in rows:
+            index.put(code, user_id, participant_id, name, status)
+        return index
+
+    def expired(self):
+        return time.monotonic() - self.built_at > getattr(settings, 'CHECKIN_INDEX_TTL', 300)
+
+    def put(self, code, user_id, participant_id, name, status):
+        self.discard_participant(participant_id)
+        previous = self.codes.get(code)
+        if previous:
+            self.by_participant.pop(previous.participant_id, None)
+        self.codes[code] = CodeEntry(user_id, participant_id, name, status)
+        self.by_participant[participant_id] = code
+        self.by_user[user_id] = code
+
+    def discard_participant(self, participant_id):
+        code = self.by_participant.pop(participant_id, None)
+        entry = self.codes.pop(code, None) if code else None
+        if entry:
+            self.by_user.pop(entry.user_id, None)
+
+    def recode_user(self, user_id, code):
+        old_code = self.by_user.get(user_id)
+        if old_code is None or old_code == code:
+            return
+        entry = self.codes[old_code]
+        self.discard_participant(entry.participant_id)
+        if code:
+            self.put(code, *entry)
+
+
+def get_index(event_id):
+    """Index for an event, built on first use; raises Event.DoesNotExist"""
+    with _lock:
+        index = _indexes.get(event_id)
+        if index is not None and not index.expired():
+            _indexes.move_to_end(event_id)
+            return index
+    if not Event.objects.filter(pk=event_id).exists():
+        raise Event.DoesNotExist
+    index = EventCodeIndex.build(event_id)
+    with _lock:
+        _indexes[event_id] = index
+        while len(_indexes) > getattr(settings, 'CHECKIN_INDEX_EVENTS', 32):
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate(event_id=None):
+    """Drop the index of one event, or of all events"""
+    with _lock:
+        if event_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(event_id, None)
+
+
+def _mark_attended(event_id, entry, qr_data, scanned_by, now):
+    """Record a check-in for a known participant.
+
+    Returns the participant's previous status, or None if the row is gone.
+    """
+    participant = Participant.objects.filter(pk=entry.participant_id)
+    status = entry.status
+    with transaction.atomic():
+        # Conditional on the expected status; re-read it only if the index was stale
+        while not participant.filter(status=status).update(status='attended', check_in_time=now, updated_at=now):
+            status = participant.values_list('status', flat=True).first()
+            if status is None:
+                return None
+        EventCounter.bump(event_id, EventCounter.transition(status, 'attended'))
+        AttendanceLog.objects.create(event_id=event_id, participant_id=entry.participant_id, time=now,
+                                     scanned_by=scanned_by, qr_code=qr_data)
+    return status
+
+
+def _check_in_from_db(event_id, qr_data, scanned_by, now):
+    """Resolve a code the index does not know: walk-ins and stale entries"""
+    profile = UserProfile.objects.select_related('user').filter(qr_code=qr_data).first()
+    if profile is None:
+        return None
+    user = profile.user
+    display_name = user.get_full_name() or user.first_name or user.username
+    with transaction.atomic():
+        registrations = Participant.objects.filter(event_id=event_id).order_by('id')
+        participant = registrations.filter(user=user).first()
+        if participant is None and user.email:
+            # Registered by email (e.g. uploaded sheet) before having an account
+            participant = registrations.with_email(user.email).first()
+            if participant is not None and participant.user_id is None:
+                participant.user = user
+        created = participant is None
+        if created:
+            participant = Participant.objects.create(
+                event_id=event_id, user=user, name=display_name, email=user.email, status='registered'
+            )
+        else:
+            if not participant.name or participant.name == 'Anonymous':
+                participant.name = display_name
+            if not participant.email:
+                participant.email = user.email
+        participant.check_in_time = now
+        participant.status = 'attended'
+        participant.save()  # post_save adds the participant to the index
+        AttendanceLog.objects.create(event_id=event_id, participant=participant, time=now,
+                                     scanned_by=scanned_by, qr_code=qr_data)
+    return CheckIn(participant.id, user.id, participant.name, participant.status, now, created)
+
+
+def check_in(event_id, qr_data, scanned_by='admin'):
+    """Mark the holder of a USER- QR code present at an event.
+
+    Returns a CheckIn, or None if no user has this code. Raises
+    Event.DoesNotExist for an unknown event.
+    """
+    now = timezone.now()
+    index = get_index(event_id)
+    entry = index.codes.get(qr_data)
+    if entry is not None:
+        if _mark_attended(event_id, entry, qr_data, scanned_by, now) is not None:
+            with _lock:
+                index.put(qr_data, entry.user_id, entry.participant_id, entry.name, 'attended')
+            return CheckIn(entry.participant_id, entry.user_id, entry.name, 'attended', now, False)
+        invalidate(event_id)  # Participant deleted elsewhere
+    return _check_in_from_db(event_id, qr_data, scanned_by, now)
+
+
+def scan_key(scan):
+    """Idempotency key of a queued scan: client supplied, else derived from its fields"""
+    if scan.get('idempotency_key'):
+        return str(scan['idempotency_key'])
+    raw = f"{scan.get('device_id', '')}:{scan.get('event_id')}:{scan.get('qr_data')}:{scan.get('scanned_at')}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _parse_scan(scan):
+    """Validate one queued scan; returns (qr_data, event_id, scanned_at) or an error string"""
+    if not isinstance(scan, dict):
+        return 'Scan must be an object'
+    qr_data = scan.get('qr_data') or ''
+    if not isinstance(qr_data, str) or not qr_data.startswith('USER-'):
+        return 'Invalid QR code format'
+    if len(str(scan.get('idempotency_key') or '')) > 64:
+        return 'idempotency_key must be at most 64 characters'
+    try:
+        event_id = int(scan.get('event_id'))
+    except (TypeError, ValueError):
+        return 'Event ID required'
+    scanned_at = scan.get('scanned_at')
+    try:
+        scanned_at = parse_datetime(scanned_at) if scanned_at else None
+    except (TypeError, ValueError):
+        scanned_at = None
+    if scanned_at is None:
+        return 'scanned_at must be an ISO 8601 datetime'
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return qr_data, event_id, scanned_at
+
+
+def check_in_batch(scans, scanned_by='admin'):
+    """Apply a queue of offline scans in one transaction.
+
+    Each scan is a dict with qr_data, event_id, scanned_at, device_id and an
+    optional idempotency_key. Scans whose key is already logged for the
+    participant are reported as duplicates, so a kiosk can safely resend
+    its queue. Returns one result dict per scan, in input order, with status
+    checked_in, duplicate, not_found or invalid.
+    """
+    now = timezone.now()
+    results = [None] * len(scans)
+    parsed = {}
+    for i, scan in enumerate(scans):
+        value = _parse_scan(scan)
+        if isinstance(value, str):
+            results[i] = {'index': i, 'status': 'invalid', 'error': value}
+        else:
+            parsed[i] = value
+
+    event_ids = set(
+        Event.objects.filter(pk__in={event_id for _, event_id, _ in parsed.values()})
+        .values_list('id', flat=True)
+    )
+    profiles = {
+        code: (user_id, ' '.join(filter(None, [first, last])) or username, email)
+        for code, user_id, first, last, username, email in UserProfile.objects.filter(
+            qr_code__in={qr_data for qr_data, _, _ in parsed.values()}
+        ).values_list('qr_code', 'user_id', 'user__first_name', 'user__last_name', 'user__username', 'user__email')
+    }
+    for i, (qr_data, event_id, _) in list(parsed.items()):
+        if event_id not in event_ids:
+            results[i] = {'index': i, 'status': 'not_found', 'error': 'Event not found'}
+        elif qr_data not in profiles:
+            results[i] = {'index': i, 'status': 'not_found', 'error': 'User not found for this QR code'}
+        else:
+            continue
+        del parsed[i]
+
+    with transaction.atomic():
+        pairs = {(event_id, profiles[qr_data][0]) for qr_data, event_id, _ in parsed.values()}
+        participants = {}
+        existing = (
+            Participant.objects.select_for_update()
+            .filter(event_id__in={event_id for event_id, _ in pairs},
+                    user_id__in={user_id for _, user_id in pairs})
+            .order_by('-id')  # Lowest id wins if a user was registered twice
+            .only('id', 'event_id', 'user_id', 'name', 'status', 'check_in_time')
+        )
+        for participant in existing:
+            participants[(participant.event_id, participant.user_id)] = participant
+
+        # Users registered by email (e.g. uploaded sheet) before having an account
+        unmatched = {
+            (event_id, profiles[qr_data][2].lower())
+            for qr_data, event_id, _ in parsed.values()
+            if (event_id, profiles[qr_data][0]) not in participants and profiles[qr_data][2]
+        }
+        by_email = {}
+        if unmatched:
+            registered = (
+                Participant.objects.select_for_update()
+                .filter(event_id__in={event_id for event_id, _ in unmatched})
+                .exclude(email='')
+                .annotate(email_lower=Lower('email'))
+                .filter(email_lower__in={email for _, email in unmatched})
+                .only('id', 'event_id', 'user_id', 'name', 'status', 'check_in_time')
+            )
+            by_email = {(participant.event_id, participant.email_lower): participant for participant in registered}
+
+        # Walk-ins: register everyone scanned at an event they had not signed up for
+        walk_ins = []
+        for qr_data, event_id, _ in parsed.values():
+            user_id, name, email = profiles[qr_data]
+            if (event_id, user_id) in participants:
+                continue
+            participant = by_email.get((event_id, email.lower())) if email else None
+            if participant is None:
+                participant = Participant(event_id=event_id, user_id=user_id, name=name,
+                                          email=email, status='registered')
+                walk_ins.append(participant)
+                if email:
+                    by_email[(event_id, email.lower())] = participant
+            elif participant.user_id is None:
+                participant.user_id = user_id
+            participants[(event_id, user_id)] = participant
+        Participant.objects.bulk_create(walk_ins)
+        # bulk_create and bulk_update skip the counter receivers
+        for event_id, count in Counter(p.event_id for p in walk_ins).items():
+            Event.objects.filter(pk=event_id).update(participants_count=F('participants_count') + count)
+            EventCounter.bump(event_id, {'registered': count})
+        loaded_status = {participant.pk: participant.status for participant in participants.values()}
+
+        keys = {i: scan_key(scans[i]) for i in parsed}
+        seen_keys = set(
+            AttendanceLog.objects.filter(
+                participant__in=list(participants.values()),
+                idempotency_key__in=set(keys.values()),
+            ).values_list('participant_id', 'idempotency_key')
+        )
+        changed = {}
+        logs = []
+        for i in sorted(parsed, key=lambda i: parsed[i][2]):
+            qr_data, event_id, scanned_at = parsed[i]
+            participant = participants[(event_id, profiles[qr_data][0])]
+            result = {'index': i, 'participant_id': participant.pk, 'name': participant.name}
+            if (participant.pk, keys[i]) in seen_keys:
+                results[i] = dict(result, status='duplicate')
+                continue
+            seen_keys.add((participant.pk, keys[i]))
+            logs.append(AttendanceLog(
+                event_id=event_id,
+                participant=participant,
+                time=scanned_at,
+                scanned_by=scanned_by,
+                qr_code=qr_data,
+                device_id=str(scans[i].get('device_id') or '')[:128],
+                idempotency_key=keys[i],
+            ))
+            # Late syncs must not move an earlier check-in or undo a completed status
+            if participant.check_in_time is None or scanned_at > participant.check_in_time:
+                participant.check_in_time = scanned_at
+            if participant.status != 'completed':
+                participant.status = 'attended'
+            participant.updated_at = now
+            changed[participant.pk] = participant
+            results[i] = dict(result, status='checked_in')
+
+        Participant.objects.bulk_update(
+            changed.values(), ['user', 'status', 'check_in_time', 'updated_at'], batch_size=500
+        )
+        transitions = Counter(
+            (participant.event_id, loaded_status[participant.pk], participant.status)
+            for participant in changed.values()
+        )
+        for (event_id, old_status, new_status), count in transitions.items():
+            EventCounter.bump(event_id, EventCounter.transition(old_status, new_status, count))
+        AttendanceLog.objects.bulk_create(logs, batch_size=500)
+        for event_id in {log.event_id for log in logs} | {p.event_id for p in walk_ins}:
+            touch_event(event_id)
+            EventRollup.mark_stale(event_id)
+    return results
+
+
+def _loaded_index(event_id):
+    with _lock:
+        return _indexes.get(event_id)
+
+
+@receiver(post_save, sender=Participant)
+def _participant_saved(sender, instance, **kwargs):
+    index = _loaded_index(instance.event_id)
+    if index is None:
+        return
+    if not instance.user_id:
+        with _lock:
+            index.discard_participant(instance.id)
+        return
+    code = index.by_user.get(instance.user_id)
+    if code is None:
+        code = UserProfile.objects.filter(user_id=instance.user_id).values_list('qr_code', flat=True).first()
+    with _lock:
+        if code:
+            index.put(code, instance.user_id, instance.id, instance.name, instance.__dict__.get('status'))
+        else:
+            index.discard_participant(instance.id)
+
+
+@receiver(post_delete, sender=Participant)
+def _participant_deleted(sender, instance, **kwargs):
+    index = _loaded_index(instance.event_id)
+    if index is not None:
+        with _lock:
+            index.discard_participant(instance.id)
+
+
+@receiver(post_save, sender=UserProfile)
+def _profile_saved(sender, instance, **kwargs):
+    with _lock:
+        for index in _indexes.values():
+            index.recode_user(instance.user_id, instance.qr_code)
+
+
+@receiver(post_delete, sender=UserProfile)
+def _profile_deleted(sender, instance, **kwargs):
+    with _lock:
+        for index in _indexes.values():
+            index.recode_user(instance.user_id, None)
+
+
+@receiver(post_delete, sender=Event)
+def _event_deleted(sender, instance, **kwargs):
+    invalidate(instance.id)
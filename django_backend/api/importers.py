@@ -0,0 +1,175 @@
+"""
+Bulk participant import from uploaded CSV/Excel registrant sheets.
+
+Rows are streamed from the upload and processed in fixed-size chunks: each
+chunk is deduplicated against the event with one query and inserted with
+bulk_create, so memory and query count stay proportional to the chunk size
+rather than the file size.
+"""
+import csv
+import io
+from itertools import chain, islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+
+from .caching import touch_event
+from .models import Event, EventCounter, EventRollup, Participant
+
+CHUNK_SIZE = 1000
+INSERT_ATTEMPTS = 3  # Per chunk, when registrations race with the import
+
+
+class ImportFormatError(ValueError):
+    """Raised when an upload cannot be read as a participant sheet"""
+
+
+def normalize_email(value):
+    """Canonical form used for duplicate detection"""
+    if value is None:
+        return ''
+    return str(value).strip().lower()
+
+
+def _column_indexes(header):
+    """Locate the name and email columns (case-insensitive)"""
+    columns = {str(h).strip().lower(): i for i, h in enumerate(header) if h is not None}
+    if 'name' not in columns or 'email' not in columns:
+        raise ImportFormatError('File must contain name and email columns')
+    return columns['name'], columns['email']
+
+
+def _rows_from_table(rows):
+    """Yield (name, email) pairs from an iterator of header + data rows"""
+    header = next(rows, None)
+    if header is None:
+        raise ImportFormatError('File is empty')
+    name_idx, email_idx = _column_indexes(header)
+    for row in rows:
+        name = row[name_idx] if name_idx < len(row) else None
+        email = row[email_idx] if email_idx < len(row) else None
+        yield name, email
+
+
+def iter_csv_rows(upload):
+    """Stream rows from a CSV upload without loading it into memory"""
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        yield from _rows_from_table(csv.reader(text))
+    finally:
+        # Leave the underlying upload open for Django to clean up
+        text.detach()
+
+
+def iter_xlsx_rows(upload):
+    """Stream rows from an .xlsx upload using openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(upload, read_only=True, data_only=True)
+    try:
+        yield from _rows_from_table(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def iter_xls_rows(upload):
+    """Legacy .xls sheets have no streaming reader; fall back to pandas"""
+    import pandas as pd
+
+    df = pd.read_excel(upload, dtype=str)
+    rows = ([None if pd.isna(v) else v for v in row] for row in df.itertuples(index=False))
+    header = iter([list(df.columns)])
+    yield from _rows_from_table(chain(header, rows))
+
+
+def iter_upload_rows(upload):
+    """Pick a row reader based on the uploaded file's extension"""
+    filename = upload.name.lower()
+    if filename.endswith('.csv'):
+        return iter_csv_rows(upload)
+    if filename.endswith('.xlsx'):
+        return iter_xlsx_rows(upload)
+    if filename.endswith('.xls'):
+        return iter_xls_rows(upload)
+    raise ImportFormatError('Unsupported file format')
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_participants(event, rows, chunk_size=CHUNK_SIZE):
+    """Register (name, email) rows for an event.
+
+    Returns counts per row class:
+    - created: new participants inserted
+    - skipped_existing: email already registered for the event
+    - skipped_duplicate: email repeated earlier in the same file
+    - invalid: missing or malformed email
+    """
+    result = {'created': 0, 'skipped_existing': 0, 'skipped_duplicate': 0, 'invalid': 0}
+    seen = set()
+
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            candidates = {}
+            for name, raw_email in chunk:
+                email = normalize_email(raw_email)
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    result['invalid'] += 1
+                    continue
+                if email in seen:
+                    result['skipped_duplicate'] += 1
+                    continue
+                seen.add(email)
+                name = str(name).strip() if name is not None else ''
+                candidates[email] = name or 'Anonymous'
+
+            if not candidates:
+                continue
+
+            for attempt in range(INSERT_ATTEMPTS):
+                existing = set(
+                    Participant.objects.filter(event=event).exclude(email='')
+                    .annotate(email_lower=Lower('email'))
+                    .filter(email_lower__in=list(candidates))
+                    .values_list('email_lower', flat=True)
+                )
+                new_participants = [
+                    Participant(event=event, name=name, email=email, status='registered')
+                    for email, name in candidates.items()
+                    if email not in existing
+                ]
+                try:
+                    with transaction.atomic():
+                        Participant.objects.bulk_create(new_participants, batch_size=chunk_size)
+                    break
+                except IntegrityError:
+                    # Registered concurrently since the check; look again so the counts stay exact
+                    if attempt == INSERT_ATTEMPTS - 1:
+                        raise
+
+            result['skipped_existing'] += len(existing)
+            result['created'] += len(new_participants)
+    finally:
+        # bulk_create skips the post_save receivers that maintain the counters; chunks commit
+        # on their own, so this also runs for the chunks inserted before a failure
+        if result['created']:
+            Event.objects.filter(pk=event.pk).update(
+                participants_count=F('participants_count') + result['created']
+            )
+            EventCounter.bump(event.pk, {'registered': result['created']})
+            touch_event(event.pk)
+            EventRollup.mark_stale(event.pk)
+
+    return result
@@ -0,0 +1,115 @@
+"""
+Batch certificate issuance for a whole event.
+
+Eligible participants are selected in one query and their Certificate rows
+created with bulk_create. PDFs are then rendered across a process pool, since
+reportlab drawing is CPU-bound and holds the GIL, and written to storage from
+the parent process.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .caching import touch_event
+from .mailer import queue_certificate_emails
+from .models import Certificate, EventCounter, EventRollup
+from .utils import certificate_context, render_certificate_pdf_bytes
+
+
+def eligible_participants(event):
+    """Participants of an event that meet its certificate requirements"""
+    return event.participants.eligible()
+
+
+def render_workers():
+    """Process count for PDF rendering (CERTIFICATE_RENDER_WORKERS, default: all cores)"""
+    return getattr(settings, 'CERTIFICATE_RENDER_WORKERS', None) or os.cpu_count() or 1
+
+
+def render_pdfs(contexts, workers=None):
+    """Yield PDF bytes for each certificate context, in order"""
+    workers = workers or render_workers()
+    if workers <= 1 or len(contexts) <= 1:
+        yield from map(render_certificate_pdf_bytes, contexts)
+        return
+    # spawn: the caller may be a threaded job worker holding DB connections
+    mp_context = multiprocessing.get_context('spawn')
+    chunksize = max(1, len(contexts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        yield from pool.map(render_certificate_pdf_bytes, contexts, chunksize=chunksize)
+
+
+def issue_event_certificates(event, send_email=True, workers=None, progress=None, batch_size=100):
+    """Issue certificates to every eligible participant of an event.
+
+    Creates missing Certificate rows, renders PDFs for certificates that have
+    none, marks the participants completed and queues email delivery for the
+    newly created certificates. `progress(done, total)` is called as PDFs are
+    stored.
+    """
+    eligible = eligible_participants(event)
+
+    with transaction.atomic():
+        missing = eligible.filter(certificate__isnull=True).only('id')
+        new_certificates = []
+        for participant in missing:
+            certificate = Certificate(participant=participant)
+            certificate.assign_codes()
+            new_certificates.append(certificate)
+        Certificate.objects.bulk_create(new_certificates, batch_size=500)
+        # Counted before the UPDATE, which bypasses the counter receivers
+        moving = eligible.exclude(status='completed').values_list('status').annotate(n=Count('id')).order_by()
+        deltas = {}
+        for old_status, n in moving:
+            deltas[old_status] = -n
+            deltas['completed'] = deltas.get('completed', 0) + n
+        # update() skips auto_now; bump updated_at by hand so change tracking sees it
+        eligible_count = eligible.update(status='completed', updated_at=timezone.now())
+        EventCounter.bump(event.pk, deltas)
+        touch_event(event.pk)
+        EventRollup.mark_stale(event.pk)
+
+    to_render = list(
+        Certificate.objects.filter(participant__in=eligible)
+        .filter(Q(pdf_file='') | Q(pdf_file__isnull=True))
+        .select_related('participant__event')
+    )
+    total = len(to_render)
+    contexts = [certificate_context(certificate) for certificate in to_render]
+
+    pending = []
+    for done, (certificate, pdf) in enumerate(zip(to_render, render_pdfs(contexts, workers)), start=1):
+        certificate.pdf_file.save(
+            f'certificate_{certificate.certificate_number}.pdf',
+            ContentFile(pdf),
+            save=False
+        )
+        pending.append(certificate)
+        if len(pending) >= batch_size or done == total:
+            Certificate.objects.bulk_update(pending, ['pdf_file'])
+            pending = []
+            if progress:
+                progress(done, total)
+
+    emails_queued = 0
+    if send_email:
+        created_numbers = {certificate.certificate_number for certificate in new_certificates}
+        to_email = [
+            certificate.id for certificate in to_render
+            if certificate.certificate_number in created_numbers and not certificate.emailed
+        ]
+        queue_certificate_emails(to_email)
+        emails_queued = len(to_email)
+
+    return {
+        'eligible': eligible_count,
+        'created': len(new_certificates),
+        'rendered': total,
+        'emails_queued': emails_queued,
+    }
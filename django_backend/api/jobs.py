@@ -0,0 +1,228 @@
+"""
+Database-backed background jobs.
+
+Work is persisted in the Job table and executed by `python manage.py run_jobs`,
+so no external broker is needed. Failed jobs are retried with exponential
+backoff until max_attempts, after which they are parked in the 'dead' state.
+
+Handlers are registered with the @handler decorator and receive the job's
+payload dict; whatever they return is stored as the job result.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, Certificate
+from .utils import generate_certificate_pdf
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# The job being executed on this thread, for report_progress()
+_current = threading.local()
+
+
+class JobError(Exception):
+    """Raised by handlers to fail a job (it will be retried)"""
+
+
+def handler(kind):
+    """Register a function as the handler for a job kind"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, max_attempts=None):
+    """Persist a job for the worker; runs inline when JOBS_EAGER is set"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    eager = getattr(settings, 'JOBS_EAGER', False)
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        max_attempts=max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5),
+        # Eager jobs are claimed by the enqueuing process straight away
+        status=Job.STATUS_RUNNING if eager else Job.STATUS_QUEUED,
+        attempts=1 if eager else 0,
+        locked_by=worker_name() if eager else '',
+        locked_at=timezone.now() if eager else None,
+    )
+    if eager:
+        # Run after the surrounding transaction so the handler sees committed rows
+        transaction.on_commit(lambda: run_job(job))
+    return job
+
+
+def enqueue_many(kind, payloads, max_attempts=None):
+    """Persist many jobs of one kind with a single bulk insert"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if getattr(settings, 'JOBS_EAGER', False):
+        return [enqueue(kind, payload, max_attempts) for payload in payloads]
+    max_attempts = max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+    return Job.objects.bulk_create(
+        [Job(kind=kind, payload=payload, max_attempts=max_attempts) for payload in payloads],
+        batch_size=500,
+    )
+
+
+def report_progress(**progress):
+    """Store progress for the running job in its result field (no-op outside a job)
+
+    Also renews the job's lock, so long jobs that report progress are not requeued as stale.
+    """
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        now = timezone.now()
+        Job.objects.filter(pk=job.pk).update(result=progress, locked_at=now, updated_at=now)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base ... capped at JOBS_RETRY_MAX_DELAY"""
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 30)
+    cap = getattr(settings, 'JOBS_RETRY_MAX_DELAY', 3600)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), cap))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker):
+    """Atomically take the next due job, or return None.
+
+    Uses a conditional UPDATE rather than row locks so the same code works on
+    SQLite and PostgreSQL: only one worker's update can flip a row from queued
+    to running.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome"""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise JobError(f"No handler registered for {job.kind}")
+        _current.job = job
+        try:
+            result = func(**job.payload)
+        finally:
+            _current.job = None
+    except Exception as e:
+        job.refresh_from_db(fields=['attempts'])
+        job.last_error = f"{e}\n{traceback.format_exc()}"
+        job.locked_by = ''
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.STATUS_DEAD
+            job.finished_at = timezone.now()
+            logger.error("Job %s (%s) dead after %s attempts: %s", job.id, job.kind, job.attempts, e)
+        else:
+            job.status = Job.STATUS_QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning("Job %s (%s) failed, retrying at %s: %s", job.id, job.kind, job.run_after, e)
+        job.save()
+        return job
+
+    job.status = Job.STATUS_SUCCEEDED
+    job.result = result
+    job.last_error = ''
+    job.locked_by = ''
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def requeue_stale(timeout=None):
+    """Return jobs left 'running' by a crashed worker to the queue"""
+    timeout = timeout or getattr(settings, 'JOBS_STALE_TIMEOUT', 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff).update(
+        status=Job.STATUS_QUEUED, locked_by='', locked_at=None, run_after=timezone.now()
+    )
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+
+@handler('render_certificate')
+def render_certificate(certificate_id, send_email=False):
+    """Render and store a certificate PDF, then optionally email it"""
+    cert = Certificate.objects.select_related('participant__event').get(pk=certificate_id)
+    pdf_buffer = generate_certificate_pdf(cert)
+    cert.pdf_file.save(
+        f'certificate_{cert.certificate_number}.pdf',
+        ContentFile(pdf_buffer.read()),
+        save=True
+    )
+    if send_email and not cert.emailed:
+        # Delivery gets its own job so a mail outage does not re-render the PDF
+        from .mailer import queue_certificate_emails
+        queue_certificate_emails([cert.id])
+    return {'certificate_number': cert.certificate_number, 'pdf_file': cert.pdf_file.name}
+
+
+@handler('send_certificate_emails')
+def send_certificate_emails_job(certificate_ids):
+    """Deliver a batch of certificates over one mail connection"""
+    from .mailer import send_certificate_emails
+
+    # Certificates already sent by an earlier attempt of this job are skipped
+    certificates = (
+        Certificate.objects.select_related('participant__event')
+        .filter(pk__in=certificate_ids).exclude(email_status=Certificate.EMAIL_SENT).order_by('pk')
+    )
+    sent, failed = send_certificate_emails(certificates)
+    if failed:
+        raise JobError(f"{failed} of {sent + failed} certificate email(s) failed")
+    return {'sent': sent}
+
+
+@handler('send_certificate_email')
+def send_certificate_email_job(certificate_id):
+    """Deliver one certificate (jobs queued before batched delivery)"""
+    return send_certificate_emails_job([certificate_id])
+
+
+@handler('issue_event_certificates')
+def issue_event_certificates_job(event_id, send_email=True):
+    """Issue certificates to every eligible participant of an event"""
+    from .issuance import issue_event_certificates
+    from .models import Event
+
+    event = Event.objects.get(pk=event_id)
+    return issue_event_certificates(
+        event,
+        send_email=send_email,
+        progress=lambda done, total: report_progress(done=done, total=total),
+    )
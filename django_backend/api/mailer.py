@@ -0,0 +1,181 @@
+"""
+Batched certificate email delivery.
+
+Certificates are queued in batches of CERTIFICATE_EMAIL_BATCH_SIZE, one
+`send_certificate_emails` job per batch. A job delivers its batch over one
+connection from Django's mail framework (get_connection(): SMTP by default,
+SendGrid's SMTP relay when SENDGRID_API_KEY is set, or the console/file
+backends for testing), attaching the stored PDF instead of rendering it
+again. Sends are paced to CERTIFICATE_EMAIL_RATE messages per second in
+total: every worker draws from one budget counted in the cache, so the
+limit holds across run_jobs threads, and across processes when the cache
+is shared (Redis or Memcached).
+
+Each certificate records the outcome of its latest email in email_status
+and email_error. A retried job only sends the certificates that are not
+'sent' yet.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .caching import touch_event
+from .jobs import enqueue_many
+from .models import Certificate
+from .utils import certificate_context, render_certificate_pdf_bytes
+
+logger = logging.getLogger(__name__)
+
+TEXT_BODY = """Congratulations, {name}!
+
+You have successfully completed {event}.
+Your certificate is attached to this email.
+
+Verification Code: {code}
+
+Best regards,
+VPAA Event Coordination System
+"""
+
+HTML_BODY = """<html>
+<body>
+    <h2>Congratulations, {name}!</h2>
+    <p>You have successfully completed <strong>{event}</strong>.</p>
+    <p>Your certificate is attached to this email.</p>
+    <p>Verification Code: <strong>{code}</strong></p>
+    <p>You can verify your certificate using the QR code on the document.</p>
+    <br>
+    <p>Best regards,<br>VPAA Event Coordination System</p>
+</body>
+</html>
+"""
+
+
+def certificate_pdf(certificate):
+    """The stored PDF, rendered (and stored) only if the file is missing"""
+    if certificate.pdf_file:
+        try:
+            with certificate.pdf_file.open('rb') as pdf_file:
+                return pdf_file.read()
+        except OSError:
+            logger.warning("Stored PDF for certificate %s is unreadable; rendering it again",
+                           certificate.certificate_number)
+    pdf = render_certificate_pdf_bytes(certificate_context(certificate))
+    certificate.pdf_file.save(f'certificate_{certificate.certificate_number}.pdf', ContentFile(pdf), save=False)
+    Certificate.objects.filter(pk=certificate.pk).update(pdf_file=certificate.pdf_file.name)
+    return pdf
+
+
+def certificate_message(certificate, pdf, connection=None):
+    """The certificate email, with a plain text and an HTML body and the PDF attached"""
+    participant = certificate.participant
+    event = participant.event
+    fields = {'name': participant.name, 'event': event.title, 'code': certificate.verification_code}
+    message = EmailMultiAlternatives(
+        subject=f'Your Certificate: {event.title}',
+        body=TEXT_BODY.format(**fields),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[participant.email],
+        connection=connection,
+    )
+    message.attach_alternative(format_html(HTML_BODY, **fields), 'text/html')
+    message.attach(f'Certificate_{certificate.certificate_number}.pdf', pdf, 'application/pdf')
+    return message
+
+
+def _record(certificate, email_status, error=''):
+    updates = {'email_status': email_status, 'email_error': error}
+    if email_status == Certificate.EMAIL_SENT:
+        updates.update(emailed=True, emailed_at=timezone.now())
+    # Skips the Certificate receivers; the batch touches each event's cache once at the end
+    Certificate.objects.filter(pk=certificate.pk).update(**updates)
+
+
+def wait_for_send_slot(rate):
+    """Block until the shared send budget has room for one more message.
+
+    Sends are counted per time window in the cache (one second, or 1/rate
+    seconds for rates below one), so concurrent workers share the rate.
+    """
+    window = max(1, 1 / rate)
+    budget = max(1, round(rate * window))
+    while True:
+        now = time.time()
+        slot = int(now // window)
+        key = f'mailer:sends:{slot}'
+        cache.add(key, 0, timeout=int(window) + 5)
+        try:
+            if cache.incr(key) <= budget:
+                return
+        except ValueError:
+            continue  # The counter expired between add() and incr()
+        time.sleep((slot + 1) * window - now)
+
+
+def send_certificate_emails(certificates, rate=None):
+    """Email certificates over one mail connection; returns (sent, failed) counts.
+
+    `certificates` should have participant__event selected. Every message
+    records its own outcome; a failed send reopens the connection and the
+    batch carries on. If the connection cannot be reopened, the rest of the
+    batch is marked failed with that error and the error is raised.
+    """
+    rate = settings.CERTIFICATE_EMAIL_RATE if rate is None else rate
+    sent = failed = 0
+    event_ids = set()
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    certificates = list(certificates)
+    try:
+        for position, certificate in enumerate(certificates):
+            event_ids.add(certificate.participant.event_id)
+            try:
+                message = certificate_message(certificate, certificate_pdf(certificate), connection)
+                if rate > 0:
+                    wait_for_send_slot(rate)
+                connection.send_messages([message])
+            except Exception as e:
+                failed += 1
+                logger.warning("Email for certificate %s to %s failed: %s",
+                               certificate.certificate_number, certificate.participant.email, e)
+                _record(certificate, Certificate.EMAIL_FAILED, str(e) or e.__class__.__name__)
+                # The server may have dropped the connection along with the message
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception as reconnect_error:
+                    error = f'Mail connection lost: {reconnect_error or reconnect_error.__class__.__name__}'
+                    remaining = certificates[position + 1:]
+                    logger.error("%s; %d certificate email(s) not sent", error, len(remaining))
+                    event_ids.update(c.participant.event_id for c in remaining)
+                    Certificate.objects.filter(pk__in=[c.pk for c in remaining]).update(
+                        email_status=Certificate.EMAIL_FAILED, email_error=error,
+                    )
+                    raise
+            else:
+                sent += 1
+                _record(certificate, Certificate.EMAIL_SENT)
+    finally:
+        connection.close()
+        for event_id in event_ids:
+            touch_event(event_id)
+    return sent, failed
+
+
+def queue_certificate_emails(certificate_ids):
+    """Mark certificates queued and enqueue their delivery in batches; returns the jobs"""
+    certificate_ids = sorted(certificate_ids)
+    if not certificate_ids:
+        return []
+    Certificate.objects.filter(pk__in=certificate_ids).update(email_status=Certificate.EMAIL_QUEUED, email_error='')
+    size = settings.CERTIFICATE_EMAIL_BATCH_SIZE
+    return enqueue_many('send_certificate_emails', [
+        {'certificate_ids': certificate_ids[start:start + size]}
+        for start in range(0, len(certificate_ids), size)
+    ])
@@ -0,0 +1,314 @@
+"""
+Django management command to benchmark the API hot paths
+Usage: python manage.py bench [--events 5] [--participants 500] [--requests 200]
+                              [--only scan_qr_code,verify] [--output run.json]
+                              [--baseline previous.json] [--threshold 20] [--min-delta 2]
+
+Runs against a throwaway database created and migrated for the run, the way
+the test runner does (an SQLite file in a temporary directory, or
+bench_<NAME> on PostgreSQL), so the configured database is never locked or
+written. Seeds a synthetic dataset (events x participants with user accounts,
+certificates and quizzes) inside a transaction, drives each endpoint through
+the Django test client and rolls everything back. Prints JSON with
+throughput, p50/p95/p99 latency and queries per request for every scenario.
+With --baseline, exits non-zero if a scenario's p95 grew by more than
+--threshold percent (and --min-delta ms) or it runs more queries per request than before.
+"""
+import gc
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api import checkin
+from api.caching import touch_event
+from api.models import Certificate, Event, Participant, Quiz, UserProfile
+
+SCENARIOS = [
+    'event_list', 'join', 'scan_qr_code', 'submit_quiz', 'issue_certificate',
+    'verify', 'report_attendance', 'report_evaluation',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+@contextmanager
+def throwaway_database(stdout=None):
+    """Point the default connection at a fresh, migrated database for the duration of the block"""
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_name, old_test_name = connection.settings_dict['NAME'], test_settings.get('NAME')
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # A file rather than the test runner's in-memory default, so timings match a deployment
+        tmpdir = tempfile.mkdtemp(prefix='bench-')
+        test_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    else:
+        test_settings['NAME'] = f'bench_{old_name}'
+    if stdout:
+        stdout.write(f'Creating throwaway database {test_settings["NAME"]}...')
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        test_settings['NAME'] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def consume(response):
+    """Read the whole body so streamed reports are timed end to end"""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks API endpoints on a synthetic dataset and reports JSON latency/throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5)
+        parser.add_argument('--participants', type=int, default=500, help='Participants per event')
+        parser.add_argument('--quizzes', type=int, default=10, help='Quiz questions per event')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+        parser.add_argument('--only', help=f'Comma-separated scenarios (default: all of {", ".join(SCENARIOS)})')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset and request order')
+        parser.add_argument('--output', help='Write the JSON results to this file as well')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=20.0, help='Allowed p95 regression in percent')
+        parser.add_argument('--min-delta', type=float, default=2.0,
+                            help='p95 increases below this many ms are treated as noise')
+
+    def handle(self, *args, **options):
+        scenarios = options['only'].split(',') if options['only'] else SCENARIOS
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        random.seed(options['seed'])
+        self.event_ids = []
+        try:
+            # DEBUG would record every query on the connection and skew the timings
+            with throwaway_database(self.stderr), override_settings(DEBUG=False), transaction.atomic():
+                self.seed(options['events'], options['participants'], options['quizzes'])
+                results = {name: self.run_scenario(name, options['requests'], options['warmup'])
+                           for name in scenarios}
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            # Rolled-back ids can be reused; drop anything cached for them
+            for event_id in self.event_ids:
+                checkin.invalidate(event_id)
+                touch_event(event_id)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'events': options['events'],
+                'participants_per_event': options['participants'],
+                'quizzes_per_event': options['quizzes'],
+                'requests': options['requests'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if baseline:
+            report['regressions'] = self.compare(baseline, results, options['threshold'], options['min_delta'])
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        if report.get('regressions'):
+            raise CommandError(f'{len(report["regressions"])} regression(s) over the baseline: '
+                               + '; '.join(report['regressions']))
+
+    def compare(self, baseline, results, threshold, min_delta):
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get('results', {}).get(name)
+            if not before:
+                continue
+            limit = max(before['p95_ms'] * (1 + threshold / 100), before['p95_ms'] + min_delta)
+            if result['p95_ms'] > limit:
+                regressions.append(f'{name} p95 {before["p95_ms"]} -> {result["p95_ms"]} ms')
+            # Query counts are deterministic for a given dataset, so any increase is real
+            if result['queries_per_request'] > before['queries_per_request'] + 0.05:
+                regressions.append(f'{name} queries/request {before["queries_per_request"]} -> '
+                                   f'{result["queries_per_request"]}')
+        return regressions
+
+    def seed(self, events, participants, quizzes):
+        tag = uuid.uuid4().hex[:6]
+        admin = User.objects.create(username=f'bench-admin-{tag}', is_staff=True)
+        self.admin_auth = f'Token {Token.objects.create(user=admin).key}'
+
+        self.events = []
+        for e in range(events):
+            event = Event.objects.create(
+                title=f'Benchmark event {e}',
+                date=timezone.localdate(),
+                status='completed',
+                requirements={'attendance': True},
+            )
+            self.events.append(event)
+            self.event_ids.append(event.id)
+            Quiz.objects.bulk_create([
+                Quiz(event=event, question=f'Question {q}', options=['a', 'b', 'c', 'd'],
+                     correct_answer=random.choice('abcd'), order=q)
+                for q in range(quizzes)
+            ])
+
+            users = User.objects.bulk_create([
+                User(username=f'bench-{tag}-{e}-{i}', first_name=f'Attendee {i}', email=f'{tag}-{e}-{i}@example.com')
+                for i in range(participants)
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, qr_code=f'USER-{user.id}-{uuid.uuid4().hex[:12].upper()}')
+                for user in users
+            ])
+            # A third have attended (certificate-eligible), half of those already have a certificate
+            Participant.objects.bulk_create([
+                Participant(event=event, user=user, name=user.first_name, email=user.email,
+                            status='attended' if i % 3 == 0 else 'registered',
+                            has_evaluated=i % 3 == 0,
+                            evaluation_data={'rating': random.randint(1, 5)} if i % 3 == 0 else {})
+                for i, user in enumerate(users)
+            ])
+            certificates = []
+            for participant in event.participants.filter(status='attended')[::2]:
+                certificate = Certificate(participant=participant)
+                certificate.assign_codes()
+                certificates.append(certificate)
+            Certificate.objects.bulk_create(certificates)
+
+        event_ids = self.event_ids
+        self.quiz_ids = {
+            event_id: list(Quiz.objects.filter(event_id=event_id).values_list('id', flat=True))
+            for event_id in event_ids
+        }
+        self.participant_ids = list(
+            Participant.objects.filter(event_id__in=event_ids).values_list('id', 'event_id')
+        )
+        self.scans = list(
+            Participant.objects.filter(event_id__in=event_ids).values_list('user__profile__qr_code', 'event_id')
+        )
+        self.eligible = list(
+            Participant.objects.filter(event_id__in=event_ids, status='attended', certificate__isnull=True)
+            .values_list('id', flat=True)
+        )
+        self.codes = list(
+            Certificate.objects.filter(participant__event_id__in=event_ids).values_list('verification_code', flat=True)
+        )
+        for shuffled in (self.participant_ids, self.scans, self.eligible, self.codes):
+            random.shuffle(shuffled)
+
+    def requests_for(self, name, client):
+        """Endless stream of zero-argument callables issuing one request each"""
+        admin = {'HTTP_AUTHORIZATION': self.admin_auth}
+        i = 0
+        while True:
+            event = self.events[i % len(self.events)]
+            if name == 'event_list':
+                yield lambda: client.get('/api/events/', **admin)
+            elif name == 'join':
+                yield lambda: client.post(f'/api/events/{event.id}/join/',
+                                          {'name': f'Walk-in {i}', 'email': f'join-{uuid.uuid4().hex}@example.com'},
+                                          content_type='application/json')
+            elif name == 'scan_qr_code':
+                qr_code, event_id = self.scans[i % len(self.scans)]
+                yield lambda: client.post('/api/scan/qr/', {'qr_data': qr_code, 'event_id': event_id},
+                                          content_type='application/json', **admin)
+            elif name == 'submit_quiz':
+                participant_id, event_id = self.participant_ids[i % len(self.participant_ids)]
+                answers = {str(quiz_id): random.choice('abcd') for quiz_id in self.quiz_ids[event_id]}
+                yield lambda: client.post(f'/api/participants/{participant_id}/submit_quiz/', {'answers': answers},
+                                          content_type='application/json', **admin)
+            elif name == 'issue_certificate':
+                # Issuing again re-renders the existing certificate, so cycling is fine
+                participant_id = self.eligible[i % len(self.eligible)]
+                yield lambda: client.post(f'/api/participants/{participant_id}/issue_certificate/',
+                                          {'send_email': False}, content_type='application/json', **admin)
+            elif name == 'verify':
+                code = self.codes[i % len(self.codes)]
+                yield lambda: client.get('/api/certificates/verify/', {'code': code})
+            elif name == 'report_attendance':
+                yield lambda: consume(client.get(f'/api/reports/attendance/{event.id}/', {'format': 'csv'}, **admin))
+            elif name == 'report_evaluation':
+                yield lambda: consume(client.get(f'/api/reports/evaluation/{event.id}/', {'format': 'csv'}, **admin))
+            i += 1
+
+    def run_scenario(self, name, count, warmup):
+        client = Client()
+        requests = self.requests_for(name, client)
+        for _ in range(warmup):
+            next(requests)()
+
+        samples = []
+        errors = 0
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        # Collector pauses land on arbitrary requests and dominate p95/p99 of fast endpoints
+        gc.collect()
+        gc.disable()
+        try:
+            with connection.execute_wrapper(count_query):
+                started = time.perf_counter()
+                for _ in range(count):
+                    request = next(requests)
+                    start = time.perf_counter()
+                    response = request()
+                    samples.append((time.perf_counter() - start) * 1000)
+                    if response.status_code >= 400:
+                        errors += 1
+                elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+
+        self.stderr.write(f'{name}: p50 {percentile(samples, 50):.2f} ms, {queries[0] / count:.1f} queries/request')
+        return {
+            'requests': count,
+            'errors': errors,
+            'throughput_rps': round(count / elapsed, 1),
+            'p50_ms': round(percentile(samples, 50), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'p99_ms': round(percentile(samples, 99), 2),
+            'max_ms': round(max(samples), 2),
+            'queries_per_request': round(queries[0] / count, 2),
+        }
@@ -0,0 +1,57 @@
+"""
+Django management command to benchmark certificate PDF rendering
+Usage: python manage.py bench_certificates [--count 200]
+
+Also renders with the static artwork layer skipped: the gap between the two
+rates is the most that caching or pre-rendering the artwork could save.
+"""
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from api.utils import render_certificate_pdf, generate_qr_code, qr_matrix, qr_runs
+
+
+SAMPLE_CONTEXT = {
+    'name': 'Maria Clara Dela Cruz',
+    'event_title': 'Faculty Development Seminar on Outcomes-Based Education',
+    'event_date': '2025-01-15',
+    'verification_code': 'VERIFY-0123456789ABCDEF',
+    'certificate_number': 'CERT-0123456789AB',
+    'issued_date': 'January 15, 2025',
+}
+
+
+def per_second(func, count):
+    func()  # Warm up imports and caches
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = 'Measures certificate PDF rendering throughput (single process)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Certificates per scenario')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        baseline = per_second(lambda: render_certificate_pdf(SAMPLE_CONTEXT), count)
+        with mock.patch('api.utils.draw_certificate_artwork'):
+            bound = per_second(lambda: render_certificate_pdf(SAMPLE_CONTEXT), count)
+        for label, rate in [('artwork drawn per certificate', baseline),
+                            ('artwork skipped (cache upper bound)', bound)]:
+            self.stdout.write(f'{label:<40} {rate:8.1f} certificates/s  ({rate / baseline:.2f}x)')
+
+        code = SAMPLE_CONTEXT['verification_code']
+        self.stdout.write('\nQR code micro-benchmarks:')
+        micro = [
+            ('qr_matrix (encode only)', lambda: qr_matrix(code)),
+            ('qr_runs (vector, PDF path)', lambda: qr_runs(qr_matrix(code))),
+            ('generate_qr_code (PNG)', lambda: generate_qr_code(code)),
+        ]
+        for label, func in micro:
+            self.stdout.write(f'{label:<40} {per_second(func, count):8.1f} codes/s')
@@ -0,0 +1,102 @@
+"""
+Django management command to benchmark QR check-in latency
+Usage: python manage.py bench_checkin [--participants 3000] [--walk-ins 100]
+
+Creates an event with registered users inside a transaction, replays a
+shuffled burst of scans through the scan endpoint and rolls everything back.
+Runs on a throwaway database (see bench.throwaway_database), never the
+configured one.
+"""
+import random
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import checkin
+from api.models import Event, Participant, UserProfile
+from api.views import scan_qr_code
+
+from .bench import throwaway_database
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Replays a burst of QR scans and reports check-in latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=3000, help='Registered attendees')
+        parser.add_argument('--walk-ins', type=int, default=100, help='Scans from users not yet registered')
+
+    def handle(self, *args, **options):
+        try:
+            with throwaway_database(self.stderr), transaction.atomic():
+                self.run(options['participants'], options['walk_ins'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_users(self, count, tag):
+        users = User.objects.bulk_create([
+            User(username=f'bench-{tag}-{i}', first_name=f'Attendee {i}', email=f'{tag}{i}@example.com')
+            for i in range(count)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, qr_code=f'USER-{user.id}-{uuid.uuid4().hex[:12].upper()}')
+            for user in users
+        ])
+        return list(UserProfile.objects.filter(user__in=users).values_list('qr_code', 'user_id'))
+
+    def run(self, participants, walk_ins):
+        tag = uuid.uuid4().hex[:6]
+        event = Event.objects.create(title='Check-in benchmark', date=timezone.localdate())
+        registered = self.create_users(participants, tag)
+        Participant.objects.bulk_create([
+            Participant(event=event, user_id=user_id, name=f'Attendee {i}', email=f'{tag}{i}@example.com')
+            for i, (_, user_id) in enumerate(registered)
+        ])
+        unregistered = self.create_users(walk_ins, f'{tag}w')
+        admin = User.objects.create(username=f'bench-admin-{tag}', is_staff=True)
+
+        scans = [code for code, _ in registered + unregistered]
+        random.shuffle(scans)
+        factory = APIRequestFactory()
+
+        def scan(code):
+            request = factory.post('/api/scan/qr/', {'qr_data': code, 'event_id': event.id}, format='json')
+            force_authenticate(request, user=admin)
+            response = scan_qr_code(request)
+            assert response.status_code == 200, response.data
+
+        checkin.invalidate()
+        start = time.perf_counter()
+        checkin.get_index(event.id)
+        self.stdout.write(f'index build ({participants} participants): {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        samples = []
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            burst_start = time.perf_counter()
+            for code in scans:
+                start = time.perf_counter()
+                scan(code)
+                samples.append((time.perf_counter() - start) * 1000)
+            elapsed = time.perf_counter() - burst_start
+
+        self.stdout.write(f'{len(scans)} scans in {elapsed:.2f}s ({len(scans) / elapsed:.0f} scans/s), '
+                          f'{len(queries) / len(scans):.1f} queries/scan')
+        for pct in (50, 95, 99):
+            self.stdout.write(f'p{pct:<3} {percentile(samples, pct):7.2f} ms')
+        self.stdout.write(f'max  {max(samples):7.2f} ms')
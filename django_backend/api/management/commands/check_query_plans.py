@@ -0,0 +1,92 @@
+"""
+Django management command to verify hot lookups are served by indexes
+Usage: python manage.py check_query_plans [--verbose]
+
+Runs EXPLAIN for the participant, event and user lookups used by the API and
+fails if a plan does not use the expected index. Works on SQLite and
+PostgreSQL; on PostgreSQL sequential scans are disabled for the check, since
+the planner prefers them on small tables regardless of available indexes.
+"""
+import datetime
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import Event, EventRollup, Participant
+
+# How each backend's EXPLAIN output names an index it reads
+INDEX_SCAN_PATTERNS = {
+    # SEARCH/SCAN api_participant USING [COVERING] INDEX participant_event_user_idx (...)
+    'sqlite': r'USING (?:COVERING )?INDEX {index}\b',
+    # Index [Only] Scan [Backward] using event_date_id_idx on api_event / Bitmap Index Scan on ...
+    'postgresql': r'(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) {index}\b',
+}
+
+
+def hot_queries():
+    """(label, queryset, expected index name) for each lookup path"""
+    today = datetime.date.today()
+    return [
+        ('participant by event + email (join, import, scan)',
+         Participant.objects.filter(event_id=1).with_email('someone@example.com'),
+         'participant_event_email_uniq'),
+        ('participant by event + user (join, check-in)',
+         Participant.objects.filter(event_id=1, user_id=1),
+         'participant_event_user_idx'),
+        ('participants by event + status (eligibility, reports)',
+         Participant.objects.filter(event_id=1, status='attended'),
+         'participant_event_status_idx'),
+        ('events on a date by status',
+         Event.objects.filter(date=today, status='upcoming'),
+         'event_date_status_idx'),
+        ('event list order (cursor pagination)',
+         Event.objects.order_by('-date', '-id')[:100],
+         'event_date_id_idx'),
+        ('rollups in a date range (summary report)',
+         EventRollup.objects.filter(date__gte=today, date__lte=today + datetime.timedelta(days=120)),
+         'event_rollup_date_loc_idx'),
+        ('user by email (login, register)',
+         User.objects.filter(email='someone@example.com'),
+         'auth_user_email_idx'),
+    ]
+
+
+def prefer_index_scans():
+    """Disable sequential scans for the rest of the current transaction (PostgreSQL only)"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+def uses_index(plan, index):
+    """Whether an EXPLAIN plan from the current backend reads the named index"""
+    return re.search(INDEX_SCAN_PATTERNS[connection.vendor].format(index=re.escape(index)), plan) is not None
+
+
+class Command(BaseCommand):
+    help = 'Checks that hot lookup queries use their indexes (EXPLAIN on SQLite/PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in INDEX_SCAN_PATTERNS:
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        failures = []
+        with transaction.atomic():
+            prefer_index_scans()
+            for label, queryset, index in hot_queries():
+                plan = queryset.explain()
+                used = uses_index(plan, index)
+                if options['verbose'] or not used:
+                    self.stdout.write(f'{label}:\n{plan}\n')
+                self.stdout.write(f"{'ok  ' if used else 'FAIL'} {label} -> {index}")
+                if not used:
+                    failures.append(label)
+
+        if failures:
+            raise CommandError(f'{len(failures)} lookup(s) not using their index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot lookups use their indexes'))
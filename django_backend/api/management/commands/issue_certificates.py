@@ -0,0 +1,42 @@
+"""
+Django management command to issue certificates for a whole event
+Usage: python manage.py issue_certificates <event_id> [--workers 8] [--no-email]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.issuance import issue_event_certificates, render_workers
+from api.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Issues certificates to every eligible participant of an event'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='PDF rendering processes (default: CERTIFICATE_RENDER_WORKERS or all cores)')
+        parser.add_argument('--no-email', action='store_true',
+                            help='Do not queue certificate emails')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} not found")
+
+        workers = options['workers'] or render_workers()
+        self.stdout.write(f'Issuing certificates for "{event.title}" with {workers} worker(s)')
+
+        def progress(done, total):
+            self.stdout.write(f'  rendered {done}/{total}')
+
+        result = issue_event_certificates(
+            event,
+            send_email=not options['no_email'],
+            workers=workers,
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} created, {result['rendered']} rendered, "
+            f"{result['emails_queued']} emails queued ({result['eligible']} eligible)"
+        ))
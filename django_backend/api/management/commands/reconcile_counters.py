@@ -0,0 +1,37 @@
+"""
+Django management command to repair drifted event counters
+Usage: python manage.py reconcile_counters [event_id ...] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import EvaluationTally, Event, EventCounter
+
+
+class Command(BaseCommand):
+    help = 'Recomputes participants_count, per-status EventCounter rows and evaluation tallies from participant data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', type=int, help='Events to check (default: all)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        events = Event.objects.order_by('id').only('id', 'title', 'participants_count')
+        if options['event_ids']:
+            events = events.filter(pk__in=options['event_ids'])
+
+        drifted = 0
+        for event in events.iterator():
+            drift = EventCounter.reconcile(event, dry_run=options['dry_run'])
+            tally_drift = EvaluationTally.reconcile(event, dry_run=options['dry_run'])
+            if not drift and not tally_drift:
+                continue
+            drifted += 1
+            details = ', '.join(
+                [f'{name} {stored} -> {actual}' for name, (stored, actual) in sorted(drift.items())]
+                + [f'evaluation {question}={answer or "text"} {stored} -> {actual}'
+                   for (question, answer), (stored, actual) in sorted(tally_drift.items())]
+            )
+            self.stdout.write(f'Event {event.id} "{event.title}": {details}')
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'{drifted} event(s) with drift {verb}'))
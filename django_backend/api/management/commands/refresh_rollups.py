@@ -0,0 +1,25 @@
+"""
+Django management command to refresh the cross-event summary rollups
+Usage: python manage.py refresh_rollups [event_id ...] [--all]
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import Event, EventRollup
+
+
+class Command(BaseCommand):
+    help = 'Recomputes EventRollup rows for events that changed since their last refresh'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', type=int, help='Events to refresh (default: stale ones)')
+        parser.add_argument('--all', action='store_true', help='Refresh every event, stale or not')
+
+    def handle(self, *args, **options):
+        if options['event_ids']:
+            events = Event.objects.filter(pk__in=options['event_ids'])
+        elif options['all']:
+            events = Event.objects.all()
+        else:
+            events = EventRollup.stale_events()
+        refreshed = EventRollup.refresh(events.order_by('id').values_list('id', flat=True))
+        self.stdout.write(self.style.SUCCESS(f'{refreshed} event rollup(s) refreshed'))
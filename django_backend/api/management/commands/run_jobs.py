@@ -0,0 +1,79 @@
+"""
+Django management command to process background jobs
+Usage: python manage.py run_jobs [--concurrency 4] [--burst]
+
+Jobs left 'running' longer than JOBS_STALE_TIMEOUT (a worker died mid-job)
+are requeued at start and every JOBS_REQUEUE_INTERVAL seconds while running.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.jobs import claim_next, run_job, requeue_stale, worker_name
+from api.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Processes queued background jobs (certificate rendering, email delivery)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOBS_CONCURRENCY,
+                            help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no due jobs are left instead of polling forever')
+
+    def handle(self, *args, **options):
+        self.requeue()
+        last_requeue = time.monotonic()
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(f'{worker_name()}-{i}', options['poll_interval'], options['burst'], stop),
+                daemon=True,
+            )
+            for i in range(max(options['concurrency'], 1))
+        ]
+        self.stdout.write(f'Starting {len(threads)} worker thread(s)')
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+                if time.monotonic() - last_requeue >= settings.JOBS_REQUEUE_INTERVAL:
+                    self.requeue()
+                    last_requeue = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after current jobs...')
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
+
+    def requeue(self):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+    def work(self, name, poll_interval, burst, stop):
+        try:
+            while not stop.is_set():
+                job = claim_next(name)
+                if job is None:
+                    if burst:
+                        return
+                    stop.wait(poll_interval)
+                    continue
+                job = run_job(job)
+                style = self.style.SUCCESS if job.status == Job.STATUS_SUCCEEDED else self.style.WARNING
+                self.stdout.write(style(f'[{name}] job {job.id} {job.kind}: {job.status}'))
+        finally:
+            # Each thread has its own DB connection
+            connection.close()
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+BATCH_SIZE = 2000
+
+
+def copy_json_logs(apps, schema_editor):
+    """Move Participant.attendance_logs JSON entries into AttendanceLog rows"""
+    Participant = apps.get_model('api', 'Participant')
+    EventSession = apps.get_model('api', 'EventSession')
+    AttendanceLog = apps.get_model('api', 'AttendanceLog')
+
+    sessions = set(EventSession.objects.values_list('id', 'event_id'))
+    rows = []
+    participants = Participant.objects.values_list('id', 'event_id', 'created_at', 'attendance_logs')
+    for participant_id, event_id, created_at, logs in participants.iterator(chunk_size=BATCH_SIZE):
+        for entry in logs or []:
+            if not isinstance(entry, dict):
+                continue
+            time = parse_datetime(str(entry.get('time') or '')) or created_at
+            if django.utils.timezone.is_naive(time):
+                time = django.utils.timezone.make_aware(time)
+            try:
+                session_id = int(entry.get('session'))
+            except (TypeError, ValueError):
+                session_id = None
+            rows.append(AttendanceLog(
+                event_id=event_id,
+                participant_id=participant_id,
+                session_id=session_id if (session_id, event_id) in sessions else None,
+                type='check_out' if entry.get('type') == 'check_out' else 'check_in',
+                time=time,
+                scanned_by=str(entry.get('scanned_by') or '')[:150],
+                qr_code=str(entry.get('qr_code') or '')[:255],
+                device_id=str(entry.get('device_id') or '')[:128],
+                idempotency_key=entry.get('idempotency_key') or None,
+            ))
+        if len(rows) >= BATCH_SIZE:
+            AttendanceLog.objects.bulk_create(rows)
+            rows = []
+    AttendanceLog.objects.bulk_create(rows)
+
+
+def restore_json_logs(apps, schema_editor):
+    Participant = apps.get_model('api', 'Participant')
+    AttendanceLog = apps.get_model('api', 'AttendanceLog')
+
+    logs = {}
+    for log in AttendanceLog.objects.order_by('participant_id', 'time', 'id').iterator(chunk_size=BATCH_SIZE):
+        entry = {'type': log.type, 'time': log.time.isoformat(), 'session': log.session_id}
+        for field in ('scanned_by', 'qr_code', 'device_id', 'idempotency_key'):
+            if getattr(log, field):
+                entry[field] = getattr(log, field)
+        logs.setdefault(log.participant_id, []).append(entry)
+    for participant_id, entries in logs.items():
+        Participant.objects.filter(pk=participant_id).update(attendance_logs=entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('check_in', 'Check in'), ('check_out', 'Check out')], default='check_in', max_length=16)),
+                ('time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('scanned_by', models.CharField(blank=True, max_length=150)),
+                ('qr_code', models.CharField(blank=True, max_length=255)),
+                ('device_id', models.CharField(blank=True, max_length=128)),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_logs', to='api.event')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_entries', to='api.participant')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_logs', to='api.eventsession')),
+            ],
+            options={
+                'ordering': ['time', 'id'],
+                'indexes': [models.Index(fields=['event', 'participant', 'time'], name='attendance_event_part_time_idx'), models.Index(fields=['session', 'type', 'time'], name='attendance_session_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('participant', 'idempotency_key'), name='attendance_idempotency_key_uniq')],
+            },
+        ),
+        migrations.RunPython(copy_json_logs, restore_json_logs),
+        migrations.RemoveField(
+            model_name='participant',
+            name='attendance_logs',
+        ),
+    ]
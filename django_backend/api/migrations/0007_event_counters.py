@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing(apps, schema_editor):
+    """Seed counters and participants_count from the current participant rows"""
+    Event = apps.get_model('api', 'Event')
+    Participant = apps.get_model('api', 'Participant')
+    EventCounter = apps.get_model('api', 'EventCounter')
+
+    counters = []
+    by_status = Participant.objects.values_list('event_id', 'status').annotate(n=Count('id')).order_by()
+    for event_id, status, n in by_status:
+        counters.append(EventCounter(event_id=event_id, name=status, value=n))
+    evaluated = (
+        Participant.objects.filter(has_evaluated=True)
+        .values_list('event_id').annotate(n=Count('id')).order_by()
+    )
+    for event_id, n in evaluated:
+        counters.append(EventCounter(event_id=event_id, name='evaluated', value=n))
+    EventCounter.objects.bulk_create(counters, batch_size=1000)
+
+    totals = dict(Participant.objects.values_list('event_id').annotate(n=Count('id')).order_by())
+    for event in Event.objects.only('id', 'participants_count'):
+        if event.participants_count != totals.get(event.id, 0):
+            Event.objects.filter(pk=event.pk).update(participants_count=totals.get(event.id, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_attendancelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('value', models.IntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='api.event')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'name'), name='event_counter_uniq')],
+            },
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
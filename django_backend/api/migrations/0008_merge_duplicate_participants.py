@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:52
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+STATUS_RANK = {'completed': 2, 'attended': 1}
+
+
+def merge_duplicate_participants(apps, schema_editor):
+    """Fold participants registered twice with one email into a single row.
+
+    The kept row is the one with a certificate, else the furthest along,
+    else the oldest. Attendance logs and the certificate move to it, and
+    missing user, evaluation and quiz data are copied from the duplicates
+    before they are deleted. A group with more than one certificate stops the
+    migration, since deleting a row would delete its issued certificate.
+    """
+    Event = apps.get_model('api', 'Event')
+    Participant = apps.get_model('api', 'Participant')
+    AttendanceLog = apps.get_model('api', 'AttendanceLog')
+    Certificate = apps.get_model('api', 'Certificate')
+    EventCounter = apps.get_model('api', 'EventCounter')
+
+    groups = (
+        Participant.objects.exclude(email='')
+        .annotate(email_lower=Lower('email'))
+        .values_list('event_id', 'email_lower')
+        .annotate(n=Count('id')).filter(n__gt=1)
+    )
+    touched_events = set()
+    for event_id, email_lower, _ in list(groups):
+        rows = list(
+            Participant.objects.filter(event_id=event_id)
+            .annotate(email_lower=Lower('email')).filter(email_lower=email_lower)
+            .order_by('id')
+        )
+        rows.sort(key=lambda p: (
+            not hasattr(p, 'certificate'), -STATUS_RANK.get(p.status, 0), p.id
+        ))
+        certified = [p for p in rows if hasattr(p, 'certificate')]
+        if len(certified) > 1:
+            raise RuntimeError(
+                f"Participants {[p.id for p in certified]} of event {event_id} share the email "
+                f"{email_lower!r} and each has a certificate "
+                f"({', '.join(p.certificate.certificate_number for p in certified)}). "
+                "Revoke all but one of these certificates, then run the migration again."
+            )
+        keeper, duplicates = rows[0], rows[1:]
+        for duplicate in duplicates:
+            keeper.user_id = keeper.user_id or duplicate.user_id
+            if duplicate.has_evaluated and not keeper.has_evaluated:
+                keeper.has_evaluated, keeper.evaluation_data = True, duplicate.evaluation_data
+            if duplicate.quiz_passed and not keeper.quiz_passed:
+                keeper.quiz_passed, keeper.quiz_score, keeper.quiz_data = (
+                    True, duplicate.quiz_score, duplicate.quiz_data
+                )
+            keeper.check_in_time = keeper.check_in_time or duplicate.check_in_time
+            keeper.check_out_time = keeper.check_out_time or duplicate.check_out_time
+        AttendanceLog.objects.filter(participant__in=duplicates).update(participant=keeper)
+        # Deleting a duplicate would cascade to its certificate
+        if not hasattr(keeper, 'certificate'):
+            Certificate.objects.filter(participant__in=duplicates).update(participant=keeper)
+        Participant.objects.filter(pk__in=[d.pk for d in duplicates]).delete()
+        keeper.save()
+        touched_events.add(event_id)
+
+    # Deletes above bypass the counter receivers; recount the affected events
+    for event_id in touched_events:
+        participants = Participant.objects.filter(event_id=event_id)
+        EventCounter.objects.filter(event_id=event_id).delete()
+        counts = dict(participants.values_list('status').annotate(n=Count('id')).order_by())
+        counts['evaluated'] = participants.filter(has_evaluated=True).count()
+        EventCounter.objects.bulk_create([
+            EventCounter(event_id=event_id, name=name, value=value) for name, value in counts.items() if value
+        ])
+        Event.objects.filter(pk=event_id).update(participants_count=participants.count())
+
+
+class Migration(migrations.Migration):
+    """Runs before the unique constraint in 0009, in its own transaction
+    (PostgreSQL refuses index changes on tables with pending deferred FK checks)"""
+
+    dependencies = [
+        ('api', '0007_event_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_participants, migrations.RunPython.noop),
+    ]
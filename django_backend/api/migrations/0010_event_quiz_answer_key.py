@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='quiz_answer_key',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:09
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+
+BUILTIN_QUESTIONS = ['rating', 'instructorRating', 'comments']
+
+
+def bucket(value):
+    """Same bucketing as EvaluationTally.bucket at the time of this migration"""
+    if value is None or value == '' or isinstance(value, (dict, list)) and not value:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return ''
+    if number != number or number in (float('inf'), float('-inf')):
+        return ''
+    return str(int(number)) if number.is_integer() else f'{number:g}'
+
+
+def tally_existing(apps, schema_editor):
+    """Seed tallies from evaluations submitted before they were maintained"""
+    Participant = apps.get_model('api', 'Participant')
+    EvaluationQuestion = apps.get_model('api', 'EvaluationQuestion')
+    EvaluationTally = apps.get_model('api', 'EvaluationTally')
+
+    custom = {}
+    for question_id, event_id in EvaluationQuestion.objects.values_list('id', 'event_id'):
+        custom.setdefault(event_id, []).append(str(question_id))
+
+    counts = Counter()
+    evaluations = (
+        Participant.objects.filter(has_evaluated=True)
+        .values_list('event_id', 'evaluation_data').iterator(chunk_size=2000)
+    )
+    for event_id, evaluation_data in evaluations:
+        if not isinstance(evaluation_data, dict):
+            continue
+        for key in BUILTIN_QUESTIONS + custom.get(event_id, []):
+            answer = bucket(evaluation_data.get(key))
+            if answer is not None:
+                counts[(event_id, key, answer)] += 1
+    EvaluationTally.objects.bulk_create([
+        EvaluationTally(event_id=event_id, question=question, answer=answer, count=count)
+        for (event_id, question, answer), count in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_event_quiz_answer_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.CharField(max_length=64)),
+                ('answer', models.CharField(blank=True, max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_tallies', to='api.event')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event', 'question', 'answer'), name='evaluation_tally_uniq')],
+            },
+        ),
+        migrations.RunPython(tally_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_evaluation_tallies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRollup',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='api.event')),
+                ('date', models.DateField()),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('registrations', models.IntegerField(default=0)),
+                ('attended', models.IntegerField(default=0)),
+                ('evaluated', models.IntegerField(default=0)),
+                ('quiz_taken', models.IntegerField(default=0)),
+                ('quiz_passed', models.IntegerField(default=0)),
+                ('certificates', models.IntegerField(default=0)),
+                ('stale', models.BooleanField(default=False)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'location'], name='event_rollup_date_loc_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+def mark_emailed_sent(apps, schema_editor):
+    Certificate = apps.get_model('api', 'Certificate')
+    Certificate.objects.filter(emailed=True).update(email_status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_event_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='email_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='email_status',
+            field=models.CharField(blank=True, choices=[('', 'Not sent'), ('queued', 'Queued'), ('sent', 'Sent'), ('failed', 'Failed')], max_length=16),
+        ),
+        migrations.RunPython(mark_emailed_sent, migrations.RunPython.noop),
+    ]
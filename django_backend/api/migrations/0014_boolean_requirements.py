@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Copied from rest_framework's BooleanField so the migration does not change with it
+TRUE_VALUES = {'t', 'true', 'y', 'yes', 'on', '1'}
+FALSE_VALUES = {'f', 'false', 'n', 'no', 'off', '0', '', 'null'}
+FLAGS = ('attendance', 'evaluation', 'quiz')
+
+
+def as_boolean(value):
+    if isinstance(value, str) and value.strip().lower() in TRUE_VALUES | FALSE_VALUES:
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def coerce_requirements(apps, schema_editor):
+    """Rewrite requirement flags stored as strings, numbers or null as JSON booleans.
+
+    The SQL eligibility check only matches JSON true/false. Strings such as
+    "false" or "no" become False; other values keep their Python truthiness.
+    """
+    Event = apps.get_model('api', 'Event')
+    for event in Event.objects.exclude(requirements={}).only('id', 'requirements').iterator():
+        requirements = event.requirements
+        if not isinstance(requirements, dict):
+            Event.objects.filter(pk=event.pk).update(requirements={})
+            continue
+        # Compared by type: 1 == True, so an equality check would skip {'quiz': 1}
+        changed = {
+            name: as_boolean(requirements[name]) for name in FLAGS
+            if name in requirements and not isinstance(requirements[name], bool)
+        }
+        if changed:
+            Event.objects.filter(pk=event.pk).update(requirements={**requirements, **changed})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_certificate_email_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(coerce_requirements, migrations.RunPython.noop),
+    ]
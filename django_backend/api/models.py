@@ -1,11 +1,21 @@
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction, IntegrityError
+from django.db.backends.signals import connection_created
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 import uuid
+from collections import Counter
 
 class Event(models.Model):
+    # Certificate requirement flags and their defaults when unset. Stored as
+    # JSON booleans (EventSerializer.validate_requirements), so the Python and
+    # SQL eligibility checks read them the same way.
+    CERTIFICATE_REQUIREMENTS = {'attendance': True, 'evaluation': False, 'quiz': False}
+
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     date = models.DateField()
@@ -20,9 +30,18 @@ class Event(models.Model):
     speakers = models.JSONField(default=list, blank=True)  # List of speakers/trainers
     agenda = models.TextField(blank=True)  # Event agenda
     is_multi_session = models.BooleanField(default=False)  # Single or multi-session event
+    # Compiled from the event's Quiz rows by the receivers below (see Quiz.compile_answer_key)
+    quiz_answer_key = models.JSONField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order (api.pagination.EventCursorPagination)
+            models.Index(fields=['-date', '-id'], name='event_date_id_idx'),
+            models.Index(fields=['date', 'status'], name='event_date_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.date})"
 
@@ -49,7 +68,42 @@ class EventSession(models.Model):
         return f"{self.event.title} - {self.session_name}"
 
 
+class ParticipantQuerySet(models.QuerySet):
+    def with_email(self, email):
+        """Case-insensitive email match, served by the (event, lower(email)) unique index"""
+        # exclude(email='') matches the index's condition so planners can use it
+        return self.exclude(email='').alias(email_lower=Lower('email')).filter(
+            email_lower=(email or '').strip().lower()
+        )
+
+    @staticmethod
+    def eligibility():
+        """SQL for Participant.is_eligible_for_certificate(), read from the joined event's requirements
+
+        The requirements are boolean flags: attendance is required unless set
+        to false (or null), evaluation and quiz only when set to true.
+        """
+        return Case(
+            When(event__requirements__evaluation=True, has_evaluated=False, then=Value(False)),
+            When(event__requirements__quiz=True, quiz_passed=False, then=Value(False)),
+            When(status__in=Participant.ATTENDED_STATUSES, then=Value(True)),
+            When(Q(event__requirements__attendance=False) | Q(event__requirements__attendance=None), then=Value(True)),
+            default=Value(False),
+            output_field=models.BooleanField(),
+        )
+
+    def with_eligibility(self):
+        """Annotate `certificate_eligible`, so serializing a page needs no per-row event checks"""
+        return self.annotate(certificate_eligible=self.eligibility())
+
+    def eligible(self, eligible=True):
+        """Participants that meet (or, with eligible=False, miss) their event's certificate requirements"""
+        return self.filter(self.eligibility()) if eligible else self.exclude(self.eligibility())
+
+
 class Participant(models.Model):
+    ATTENDED_STATUSES = ('attended', 'completed')
+
     event = models.ForeignKey(Event, related_name='participants', on_delete=models.CASCADE)
     user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     name = models.CharField(max_length=255)
@@ -62,30 +116,61 @@ class Participant(models.Model):
     quiz_passed = models.BooleanField(default=False)
     quiz_score = models.FloatField(null=True, blank=True)
     quiz_data = models.JSONField(null=True, blank=True)  # Quiz answers
-    attendance_logs = models.JSONField(default=list, blank=True)  # Session-based attendance
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ParticipantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (api.pagination.ParticipantCursorPagination)
+            models.Index(fields=['created_at', 'id'], name='participant_created_id_idx'),
+            models.Index(fields=['event', 'user'], name='participant_event_user_idx'),
+            models.Index(fields=['event', 'status'], name='participant_event_status_idx'),
+        ]
+        constraints = [
+            # One registration per email and event; anonymous sign-ups have no email
+            models.UniqueConstraint(
+                'event', Lower('email'),
+                condition=~Q(email=''),
+                name='participant_event_email_uniq',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} <{self.email}> - {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_state()
+        return instance
+
+    def remember_counted_state(self):
+        """Snapshot the fields EventCounter tracks so the next save can diff them"""
+        self._counted_state = {
+            field: self.__dict__[field] for field in EventCounter.TRACKED_FIELDS if field in self.__dict__
+        }
+
     def is_eligible_for_certificate(self):
-        """Check if participant meets all requirements for certificate"""
+        """Check if participant meets all requirements for certificate (in SQL: ParticipantQuerySet.eligibility)"""
         event = self.event
         req = event.requirements or {}
         
+        defaults = Event.CERTIFICATE_REQUIREMENTS
+        
         # Must have attended
-        if req.get('attendance', True):
-            if self.status not in ['attended', 'completed']:
+        if req.get('attendance', defaults['attendance']):
+            if self.status not in self.ATTENDED_STATUSES:
                 return False
         
         # Must have evaluated if required
-        if req.get('evaluation', False):
+        if req.get('evaluation', defaults['evaluation']):
             if not self.has_evaluated:
                 return False
         
         # Must have passed quiz if required
-        if req.get('quiz', False):
+        if req.get('quiz', defaults['quiz']):
             if not self.quiz_passed:
                 return False
         
@@ -93,6 +178,17 @@ class Participant(models.Model):
 
 
 class Certificate(models.Model):
+    # Delivery state of the latest email (api/mailer.py)
+    EMAIL_QUEUED = 'queued'
+    EMAIL_SENT = 'sent'
+    EMAIL_FAILED = 'failed'
+    EMAIL_STATUS_CHOICES = [
+        ('', 'Not sent'),
+        (EMAIL_QUEUED, 'Queued'),
+        (EMAIL_SENT, 'Sent'),
+        (EMAIL_FAILED, 'Failed'),
+    ]
+
     participant = models.OneToOneField(Participant, related_name='certificate', on_delete=models.CASCADE)
     certificate_number = models.CharField(max_length=100, unique=True)
     verification_code = models.CharField(max_length=50, unique=True)  # QR code data
@@ -100,18 +196,175 @@ class Certificate(models.Model):
     issued_at = models.DateTimeField(auto_now_add=True)
     emailed = models.BooleanField(default=False)
     emailed_at = models.DateTimeField(null=True, blank=True)
+    email_status = models.CharField(max_length=16, choices=EMAIL_STATUS_CHOICES, blank=True)
+    email_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (api.pagination.CertificateCursorPagination)
+            models.Index(fields=['-issued_at', '-id'], name='certificate_issued_id_idx'),
+        ]
     
     def __str__(self):
         return f"Certificate {self.certificate_number} - {self.participant.name}"
 
-    def save(self, *args, **kwargs):
+    def assign_codes(self):
+        """Fill in certificate number and verification code (bulk_create skips save())"""
         if not self.certificate_number:
             self.certificate_number = f"CERT-{uuid.uuid4().hex[:12].upper()}"
         if not self.verification_code:
             self.verification_code = f"VERIFY-{uuid.uuid4().hex[:16].upper()}"
+
+    def save(self, *args, **kwargs):
+        self.assign_codes()
         super().save(*args, **kwargs)
 
 
+class AttendanceLog(models.Model):
+    """One check-in or check-out, appended per scan (never rewritten)"""
+    TYPE_CHECK_IN = 'check_in'
+    TYPE_CHECK_OUT = 'check_out'
+    TYPE_CHOICES = [
+        (TYPE_CHECK_IN, 'Check in'),
+        (TYPE_CHECK_OUT, 'Check out'),
+    ]
+
+    event = models.ForeignKey(Event, related_name='attendance_logs', on_delete=models.CASCADE)
+    participant = models.ForeignKey(Participant, related_name='attendance_entries', on_delete=models.CASCADE)
+    session = models.ForeignKey(EventSession, related_name='attendance_logs', null=True, blank=True,
+                                on_delete=models.SET_NULL)
+    type = models.CharField(max_length=16, choices=TYPE_CHOICES, default=TYPE_CHECK_IN)
+    time = models.DateTimeField(default=timezone.now)
+    scanned_by = models.CharField(max_length=150, blank=True)
+    qr_code = models.CharField(max_length=255, blank=True)
+    device_id = models.CharField(max_length=128, blank=True)  # Kiosk that scanned offline
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)  # Dedups kiosk resends
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['time', 'id']
+        indexes = [
+            models.Index(fields=['event', 'participant', 'time'], name='attendance_event_part_time_idx'),
+            # Session-level attendance (who checked in to a session)
+            models.Index(fields=['session', 'type', 'time'], name='attendance_session_time_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'idempotency_key'], name='attendance_idempotency_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} {self.participant_id} at {self.time}"
+
+    def as_dict(self):
+        """Shape of the former Participant.attendance_logs entries"""
+        return {
+            'type': self.type,
+            'time': self.time.isoformat(),
+            'session': self.session_id,
+            'scanned_by': self.scanned_by,
+            'qr_code': self.qr_code,
+            'device_id': self.device_id,
+        }
+
+
+class EventCounter(models.Model):
+    """Denormalized participant totals for an event, kept current with F() increments.
+
+    `name` is a participant status (registered, attended, completed, ...) or
+    'evaluated'. Saves and deletes of single participants are counted by the
+    signal receivers below; bulk writes call bump() themselves. Drift is
+    repaired by `python manage.py reconcile_counters`.
+    """
+    EVALUATED = 'evaluated'
+    TRACKED_FIELDS = ('status', 'has_evaluated')
+
+    event = models.ForeignKey(Event, related_name='counters', on_delete=models.CASCADE)
+    name = models.CharField(max_length=32)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'name'], name='event_counter_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} {self.name}={self.value}"
+
+    @classmethod
+    def bump(cls, event_id, deltas, create=True):
+        """Apply {name: delta} increments in one UPDATE; missing rows are created when `create`"""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # Plain SQL: this runs on every check-in, and compiling the equivalent
+        # Case/When UPDATE through the ORM costs far more than executing it
+        table = connection.ops.quote_name(cls._meta.db_table)
+        cases = ' '.join(['WHEN %s THEN %s'] * len(deltas))
+        placeholders = ', '.join(['%s'] * len(deltas))
+        params = [value for item in deltas.items() for value in item] + [event_id, *deltas]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET value = value + CASE name {cases} ELSE 0 END '
+                f'WHERE event_id = %s AND name IN ({placeholders})',
+                params,
+            )
+            updated = cursor.rowcount
+        if updated == len(deltas) or not create:
+            return
+        counters = cls.objects.filter(event_id=event_id, name__in=list(deltas))
+        missing = set(deltas) - set(counters.values_list('name', flat=True))
+        for name in missing:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(event_id=event_id, name=name, value=deltas[name])
+            except IntegrityError:
+                # Created concurrently by another request
+                cls.objects.filter(event_id=event_id, name=name).update(value=F('value') + deltas[name])
+
+    @staticmethod
+    def transition(old_status, new_status, count=1):
+        """Deltas for participants moving from one status to another"""
+        if old_status == new_status:
+            return {}
+        return {old_status: -count, new_status: count}
+
+    @classmethod
+    def totals(cls, event_id):
+        return dict(cls.objects.filter(event_id=event_id).values_list('name', 'value'))
+
+    @classmethod
+    def actual(cls, event_id):
+        """Totals recomputed from the participant rows"""
+        participants = Participant.objects.filter(event_id=event_id)
+        counts = dict(participants.values_list('status').annotate(n=Count('id')).order_by('status'))
+        counts[cls.EVALUATED] = participants.filter(has_evaluated=True).count()
+        return counts
+
+    @classmethod
+    def reconcile(cls, event, dry_run=False):
+        """Rewrite drifted counters (and participants_count) for an event.
+
+        Returns {name: (stored, actual)} for every value that was wrong.
+        """
+        with transaction.atomic():
+            actual = cls.actual(event.pk)
+            stored = cls.totals(event.pk)
+            drift = {
+                name: (stored.get(name, 0), actual.get(name, 0))
+                for name in set(stored) | set(actual)
+                if stored.get(name, 0) != actual.get(name, 0)
+            }
+            total = Participant.objects.filter(event_id=event.pk).count()
+            if event.participants_count != total:
+                drift['participants_count'] = (event.participants_count, total)
+            if drift and not dry_run:
+                cls.objects.filter(event_id=event.pk).exclude(name__in=list(actual)).delete()
+                for name, value in actual.items():
+                    cls.objects.update_or_create(event_id=event.pk, name=name, defaults={'value': value})
+                Event.objects.filter(pk=event.pk).update(participants_count=total)
+        return drift
+
+
 class Quiz(models.Model):
     """Quiz questions for events"""
     event = models.ForeignKey(Event, related_name='quizzes', on_delete=models.CASCADE)
@@ -128,6 +381,24 @@ class Quiz(models.Model):
     def __str__(self):
         return f"{self.event.title} - Q{self.order + 1}"
 
+    @staticmethod
+    def normalize_answer(value):
+        return str(value).strip().lower()
+
+    @classmethod
+    def compile_answer_key(cls, event_id):
+        """Grading data for an event's quiz, in question order (stored on Event.quiz_answer_key)"""
+        rows = list(cls.objects.filter(event_id=event_id).order_by('order', 'id')
+                    .values_list('id', 'question', 'correct_answer', 'points'))
+        return {
+            'ids': [quiz_id for quiz_id, _, _, _ in rows],
+            'questions': [question for _, question, _, _ in rows],
+            'correct_answers': [answer for _, _, answer, _ in rows],
+            'answers': [cls.normalize_answer(answer) for _, _, answer, _ in rows],
+            'points': [points for _, _, _, points in rows],
+            'max_points': sum(points for _, _, _, points in rows),
+        }
+
 
 class EvaluationQuestion(models.Model):
     """Custom evaluation questions for events"""
@@ -144,6 +415,201 @@ class EvaluationQuestion(models.Model):
         return f"{self.event.title} - Eval Q{self.order + 1}"
 
 
+class EvaluationTally(models.Model):
+    """How many evaluations of an event gave `answer` to `question`.
+
+    Questions are the built-in form fields plus the event's EvaluationQuestion
+    rows (answered under their id). Numeric answers are counted per value;
+    other non-empty answers are counted under TEXT. Kept current when
+    evaluations are submitted or removed, so analytics read these rows
+    instead of every response.
+    """
+    TEXT = ''
+    BUILTIN_QUESTIONS = (
+        ('rating', 'Overall rating', 'rating'),
+        ('instructorRating', 'Instructor rating', 'rating'),
+        ('comments', 'Comments', 'text'),
+    )
+
+    event = models.ForeignKey(Event, related_name='evaluation_tallies', on_delete=models.CASCADE)
+    question = models.CharField(max_length=64)
+    answer = models.CharField(max_length=32, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'question', 'answer'], name='evaluation_tally_uniq'),
+        ]
+
+    @classmethod
+    def question_keys(cls, event_id):
+        return [key for key, _, _ in cls.BUILTIN_QUESTIONS] + [
+            str(question_id) for question_id in
+            EvaluationQuestion.objects.filter(event_id=event_id).values_list('id', flat=True)
+        ]
+
+    @classmethod
+    def bucket(cls, value):
+        """Tally bucket for an answer, or None if unanswered"""
+        if value is None or value == '' or isinstance(value, (dict, list)) and not value:
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return cls.TEXT
+        if number != number or number in (float('inf'), float('-inf')):
+            return cls.TEXT
+        return str(int(number)) if number.is_integer() else f'{number:g}'
+
+    @classmethod
+    def answers_of(cls, evaluation_data, keys):
+        """[(question, bucket)] for the answered questions of one evaluation"""
+        if not isinstance(evaluation_data, dict):
+            return []
+        answered = []
+        for key in keys:
+            bucket = cls.bucket(evaluation_data.get(key))
+            if bucket is not None:
+                answered.append((key, bucket))
+        return answered
+
+    @classmethod
+    def record(cls, event_id, evaluation_data, delta=1, keys=None):
+        """Add (or with delta=-1, remove) one evaluation's answers"""
+        if keys is None:
+            keys = cls.question_keys(event_id)
+        for question, answer in cls.answers_of(evaluation_data, keys):
+            tallies = cls.objects.filter(event_id=event_id, question=question, answer=answer)
+            if tallies.update(count=F('count') + delta) or delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(event_id=event_id, question=question, answer=answer, count=delta)
+            except IntegrityError:
+                # Created concurrently by another submission
+                tallies.update(count=F('count') + delta)
+
+    @classmethod
+    def actual(cls, event_id):
+        """{(question, answer): count} recomputed from the stored evaluations"""
+        keys = cls.question_keys(event_id)
+        counts = Counter()
+        evaluations = (
+            Participant.objects.filter(event_id=event_id, has_evaluated=True)
+            .values_list('evaluation_data', flat=True).iterator(chunk_size=2000)
+        )
+        for evaluation_data in evaluations:
+            counts.update(cls.answers_of(evaluation_data, keys))
+        return dict(counts)
+
+    @classmethod
+    def reconcile(cls, event, dry_run=False):
+        """Rewrite drifted tallies for an event; returns {(question, answer): (stored, actual)}"""
+        with transaction.atomic():
+            actual = cls.actual(event.pk)
+            stored = {
+                (question, answer): count for question, answer, count in
+                cls.objects.filter(event_id=event.pk).values_list('question', 'answer', 'count')
+            }
+            drift = {
+                key: (stored.get(key, 0), actual.get(key, 0))
+                for key in set(stored) | set(actual)
+                if stored.get(key, 0) != actual.get(key, 0)
+            }
+            if drift and not dry_run:
+                cls.objects.filter(event_id=event.pk).delete()
+                cls.objects.bulk_create([
+                    cls(event_id=event.pk, question=question, answer=answer, count=count)
+                    for (question, answer), count in actual.items()
+                ])
+        return drift
+
+
+class EventRollup(models.Model):
+    """Per-event participation totals behind the cross-event summary report.
+
+    A materialized copy of what the participant rows add up to, with the
+    event's date and location, so semester-wide numbers are grouped from one
+    row per event. Changes mark the row stale (on commit) instead of
+    recounting; refresh() recomputes stale rows, from
+    `python manage.py refresh_rollups` or when the summary is read. Events
+    without a row count as stale.
+    """
+    COUNTS = ('registrations', 'attended', 'evaluated', 'quiz_taken', 'quiz_passed', 'certificates')
+
+    event = models.OneToOneField(Event, primary_key=True, related_name='rollup', on_delete=models.CASCADE)
+    date = models.DateField()
+    location = models.CharField(max_length=255, blank=True)
+    registrations = models.IntegerField(default=0)
+    attended = models.IntegerField(default=0)
+    evaluated = models.IntegerField(default=0)
+    quiz_taken = models.IntegerField(default=0)
+    quiz_passed = models.IntegerField(default=0)
+    certificates = models.IntegerField(default=0)
+    stale = models.BooleanField(default=False)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Summary report: date range, grouped by month and location
+            models.Index(fields=['date', 'location'], name='event_rollup_date_loc_idx'),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.event_id} ({self.date}, {self.location})"
+
+    @classmethod
+    def mark_stale(cls, event_id=None, participant_id=None):
+        """Flag an event's rollup (or the one of a participant's event) once the transaction commits"""
+        rollups = cls.objects.filter(stale=False)
+        if participant_id is not None:
+            rollups = rollups.filter(event__participants__id=participant_id)
+        else:
+            rollups = rollups.filter(event_id=event_id)
+        transaction.on_commit(lambda: rollups.update(stale=True))
+
+    @classmethod
+    def stale_events(cls):
+        """Events whose rollup is stale or missing"""
+        return Event.objects.filter(Q(rollup__isnull=True) | Q(rollup__stale=True))
+
+    @classmethod
+    def refresh(cls, event_ids, batch_size=200):
+        """Recompute the rollups of the given events; returns how many were written"""
+        event_ids = list(event_ids)
+        written = 0
+        for start in range(0, len(event_ids), batch_size):
+            events = list(Event.objects.filter(pk__in=event_ids[start:start + batch_size])
+                          .values_list('id', 'date', 'location'))
+            batch = [event_id for event_id, _, _ in events]
+            # Create missing rows and clear the flag before counting, so a change
+            # committed while counting leaves the row stale for the next refresh
+            cls.objects.bulk_create([
+                cls(event_id=event_id, date=date, location=location, stale=True)
+                for event_id, date, location in events
+            ], ignore_conflicts=True)
+            cls.objects.filter(event_id__in=batch).update(stale=False)
+            counts = {
+                row.pop('event_id'): row for row in
+                Participant.objects.filter(event_id__in=batch).order_by().values('event_id').annotate(
+                    registrations=Count('id'),
+                    attended=Count('id', filter=Q(status__in=Participant.ATTENDED_STATUSES)),
+                    evaluated=Count('id', filter=Q(has_evaluated=True)),
+                    quiz_taken=Count('id', filter=Q(quiz_score__isnull=False)),
+                    quiz_passed=Count('id', filter=Q(quiz_passed=True)),
+                    certificates=Count('certificate'),
+                )
+            }
+            now = timezone.now()
+            cls.objects.bulk_create([
+                cls(event_id=event_id, date=date, location=location, refreshed_at=now, **counts.get(event_id, {}))
+                for event_id, date, location in events
+            ], update_conflicts=True, unique_fields=['event'],
+                update_fields=['date', 'location', 'refreshed_at', *cls.COUNTS])
+            written += len(events)
+        return written
+
+
 class UserProfile(models.Model):
     """Extended user profile to store QR code"""
     user = models.OneToOneField(User, related_name='profile', on_delete=models.CASCADE)
@@ -166,3 +632,130 @@ def create_user_profile(sender, instance, created, **kwargs):
     """Automatically create profile when user is created"""
     if created:
         UserProfile.objects.get_or_create(user=instance)
+
+
+class Job(models.Model):
+    """Background work item processed by `manage.py run_jobs` (see api/jobs.py)"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_DEAD = 'dead'  # Gave up after max_attempts
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)  # Not picked up before this time (retry backoff)
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker poll: next queued job that is due
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.kind} ({self.status})"
+
+
+def _counter_deltas(old, new):
+    deltas = {}
+    if 'status' in old and 'status' in new and old['status'] != new['status']:
+        deltas.update(EventCounter.transition(old['status'], new['status']))
+    if 'has_evaluated' in old and 'has_evaluated' in new and bool(old['has_evaluated']) != bool(new['has_evaluated']):
+        deltas[EventCounter.EVALUATED] = 1 if new['has_evaluated'] else -1
+    return deltas
+
+
+@receiver(post_save, sender=Participant)
+def count_participant(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep participants_count and EventCounter rows current on save"""
+    if raw:
+        return
+    new = {field: instance.__dict__[field] for field in EventCounter.TRACKED_FIELDS if field in instance.__dict__}
+    if update_fields is not None:
+        new = {field: value for field, value in new.items() if field in update_fields}
+    if created:
+        Event.objects.filter(pk=instance.event_id).update(participants_count=F('participants_count') + 1)
+        deltas = {new.get('status'): 1}
+        if new.get('has_evaluated'):
+            deltas[EventCounter.EVALUATED] = 1
+    else:
+        deltas = _counter_deltas(getattr(instance, '_counted_state', {}), new)
+    EventCounter.bump(instance.event_id, deltas)
+    instance.remember_counted_state()
+
+
+@receiver(post_delete, sender=Participant)
+def uncount_participant(sender, instance, origin=None, **kwargs):
+    """Decrement counters when a participant is removed (not when its event is)"""
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    Event.objects.filter(pk=instance.event_id).update(participants_count=F('participants_count') - 1)
+    deltas = {instance.__dict__.get('status'): -1}
+    if instance.__dict__.get('has_evaluated'):
+        deltas[EventCounter.EVALUATED] = -1
+    EventCounter.bump(instance.event_id, deltas, create=False)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """WAL + busy_timeout so gunicorn workers don't fail on each other's write locks"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}')
+        if not connection.is_in_memory_db():
+            cursor.execute(f'PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}')
+        cursor.execute(f'PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}')
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def compile_quiz(sender, instance, raw=False, origin=None, **kwargs):
+    """Recompile the event's answer key whenever one of its questions changes"""
+    if raw or isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    Event.objects.filter(pk=instance.event_id).update(quiz_answer_key=Quiz.compile_answer_key(instance.event_id))
+
+
+@receiver(post_delete, sender=Participant)
+def untally_evaluation(sender, instance, origin=None, **kwargs):
+    """Remove a deleted participant's answers from the evaluation tallies"""
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    if instance.__dict__.get('has_evaluated'):
+        EvaluationTally.record(instance.event_id, instance.__dict__.get('evaluation_data'), delta=-1)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+@receiver(post_save, sender=AttendanceLog)  # Check-ins update the participant without saving it
+def stale_rollup(sender, instance, raw=False, origin=None, **kwargs):
+    """Flag the event's rollup when its participation changes"""
+    if raw or isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    EventRollup.mark_stale(instance.pk if sender is Event else instance.event_id)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def stale_certificate_rollup(sender, instance, raw=False, origin=None, **kwargs):
+    """Flag the rollup of the certificate holder's event"""
+    if raw or isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        return
+    EventRollup.mark_stale(participant_id=instance.participant_id)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor (keyset) pagination with a client-adjustable page size.
+
+    The default page size comes from REST_FRAMEWORK['PAGE_SIZE']; clients may
+    ask for more or fewer rows with `?page_size=` up to API_MAX_PAGE_SIZE.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+
+
+class EventCursorPagination(KeysetPagination):
+    """Events newest date first, id breaks ties"""
+    ordering = ('-date', '-id')
+
+
+class ParticipantCursorPagination(KeysetPagination):
+    """Participants in registration order (oldest first)"""
+    ordering = ('created_at', 'id')
+
+
+class CertificateCursorPagination(KeysetPagination):
+    """Certificates most recently issued first"""
+    ordering = ('-issued_at', '-id')
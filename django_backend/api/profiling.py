@@ -0,0 +1,196 @@
+"""
+Opt-in per-request profiling (PROFILING_ENABLED=1).
+
+RequestProfilingMiddleware records, for every request, the resolved view
+name, the number of SQL queries, time spent in SQL, time spent building
+serializer data and wall time. The totals are sent back in a Server-Timing
+header (shown in the browser's network panel) and kept in a rolling window
+of recent samples per view, summarised by the admin-only /api/metrics/.
+
+SQL statements slower than PROFILING_SLOW_QUERY_MS are logged, and a request
+that runs the same statement PROFILING_NPLUSONE_THRESHOLD times or more is
+logged and counted as a likely N+1. Samples are per process; each worker
+reports its own window. Wall time covers rendering but not the body of
+streamed responses (CSV/PDF reports).
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+Sample = namedtuple('Sample', ['wall_ms', 'sql_ms', 'serializer_ms', 'queries', 'repeated_sql'])
+
+# Upper bounds (ms) of the wall-time histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.statements = Counter()
+
+    @property
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+
+def _record_sql(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        profile.queries += 1
+        profile.sql_time += elapsed
+        profile.statements[sql] += 1
+        if elapsed * 1000 >= settings.PROFILING_SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, profile.view_name, sql)
+
+
+def _install_serializer_timer():
+    """Time the outermost `serializer.data` of each request (nested ones are part of it)"""
+    original = BaseSerializer.data.fget
+    if getattr(original, 'profiled', False):
+        return
+
+    def data(self):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return original(self)
+        profile.serializing = True
+        start = time.perf_counter()
+        try:
+            return original(self)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile.serializing = False
+
+    data.profiled = True
+    BaseSerializer.data = property(data)
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ProfileStore:
+    """Last PROFILING_WINDOW samples per view"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._repeated_example = {}
+
+    def record(self, view_name, sample):
+        with self._lock:
+            samples = self._samples.get(view_name)
+            if samples is None:
+                samples = self._samples[view_name] = deque(maxlen=settings.PROFILING_WINDOW)
+            samples.append(sample)
+            if sample.repeated_sql:
+                self._repeated_example[view_name] = sample.repeated_sql
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._repeated_example.clear()
+
+    def summary(self):
+        """Per-view latency percentiles, histogram and query statistics, slowest p95 first"""
+        with self._lock:
+            snapshot = {view: list(samples) for view, samples in self._samples.items()}
+            repeated = dict(self._repeated_example)
+
+        views = []
+        for view, samples in snapshot.items():
+            wall = sorted(sample.wall_ms for sample in samples)
+            buckets = Counter()
+            for ms in wall:
+                bound = next((b for b in HISTOGRAM_BOUNDS_MS if ms <= b), None)
+                buckets[f'le_{bound}' if bound else 'inf'] += 1
+            count = len(samples)
+            views.append({
+                'view': view,
+                'count': count,
+                'wall_ms': {
+                    'p50': round(_percentile(wall, 50), 2),
+                    'p95': round(_percentile(wall, 95), 2),
+                    'p99': round(_percentile(wall, 99), 2),
+                    'max': round(wall[-1], 2),
+                },
+                'histogram_ms': {
+                    key: buckets[key]
+                    for key in [f'le_{b}' for b in HISTOGRAM_BOUNDS_MS] + ['inf'] if buckets[key]
+                },
+                'queries': {
+                    'mean': round(sum(s.queries for s in samples) / count, 1),
+                    'max': max(s.queries for s in samples),
+                },
+                'sql_ms_mean': round(sum(s.sql_ms for s in samples) / count, 2),
+                'serializer_ms_mean': round(sum(s.serializer_ms for s in samples) / count, 2),
+                'n_plus_one_requests': sum(1 for s in samples if s.repeated_sql),
+                'n_plus_one_example': repeated.get(view),
+            })
+        views.sort(key=lambda v: v['wall_ms']['p95'], reverse=True)
+        return views
+
+
+store = ProfileStore()
+
+
+class RequestProfilingMiddleware:
+    """Server-Timing headers and /api/metrics/ samples; removed unless PROFILING_ENABLED"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install_serializer_timer()
+
+    def __call__(self, request):
+        profile = RequestProfile(request)
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_sql))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        repeated_sql = None
+        if profile.statements:
+            sql, times = profile.statements.most_common(1)[0]
+            if times >= settings.PROFILING_NPLUSONE_THRESHOLD:
+                repeated_sql = {'sql': sql, 'times': times}
+                logger.warning("Possible N+1 in %s: same query run %d times: %s", profile.view_name, times, sql)
+
+        sql_ms = profile.sql_time * 1000
+        serializer_ms = profile.serializer_time * 1000
+        store.record(profile.view_name, Sample(wall_ms, sql_ms, serializer_ms, profile.queries, repeated_sql))
+        response['Server-Timing'] = (
+            f'db;dur={sql_ms:.2f};desc="{profile.queries} queries", '
+            f'serializer;dur={serializer_ms:.2f}, total;dur={wall_ms:.2f}'
+        )
+        return response
@@ -0,0 +1,118 @@
+"""
+Content-addressed cache for generated QR code images.
+
+QR payloads never change once issued, so an image is fully determined by its
+(payload, size, format) key. Images are kept in an in-process LRU and,
+when QR_CACHE_DIR is set, in a shared on-disk layer; responses carry a
+strong ETag derived from the key. The URLs serving them are not keyed by
+payload (/api/auth/me/qr/ depends on who is logged in, an event's code can
+be replaced), so browsers must revalidate every use, which costs a 304.
+"""
+import functools
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from .utils import generate_qr_code, qr_matrix
+
+QRImage = namedtuple('QRImage', ['content', 'content_type', 'etag'])
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def generate_qr_svg(data):
+    """QR code as a standalone SVG document (one path, module units)"""
+    matrix = qr_matrix(data)
+    modules = len(matrix)
+    path = []
+    for row_idx, row in enumerate(matrix):
+        col = 0
+        while col < modules:
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < modules and row[col]:
+                col += 1
+            path.append(f'M{start} {row_idx}h{col - start}v1h-{col - start}z')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {modules} {modules}" '
+        f'shape-rendering="crispEdges"><rect width="100%" height="100%" fill="#fff"/>'
+        f'<path d="{"".join(path)}" fill="#000"/></svg>'
+    ).encode()
+
+
+def cache_key(data, size, fmt):
+    return hashlib.sha256(f'{fmt}:{size}:{data}'.encode()).hexdigest()
+
+
+def _render(data, size, fmt):
+    if fmt == 'svg':
+        return generate_qr_svg(data)
+    return generate_qr_code(data, size=size).getvalue()
+
+
+def _disk_path(key, fmt):
+    cache_dir = getattr(settings, 'QR_CACHE_DIR', None)
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, key[:2], f'{key}.{fmt}')
+
+
+def _read_disk(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(path, content):
+    """Write atomically so concurrent workers never see a partial file"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # The disk layer is best-effort
+
+
+@functools.lru_cache(maxsize=getattr(settings, 'QR_CACHE_SIZE', 1024))
+def get_qr_image(data, size=200, fmt='png'):
+    """Return a QRImage for the payload, rendering it at most once per key"""
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported QR format: {fmt}")
+    key = cache_key(data, size, fmt)
+    path = _disk_path(key, fmt)
+    content = _read_disk(path) if path else None
+    if content is None:
+        content = _render(data, size, fmt)
+        if path:
+            _write_disk(path, content)
+    return QRImage(content, CONTENT_TYPES[fmt], f'"{key[:32]}"')
+
+
+def qr_image_response(request, data, size=200, fmt='png'):
+    """Serve a cached QR image, revalidated by ETag on every use"""
+    image = get_qr_image(data, size, fmt)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if image.etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(image.content, content_type=image.content_type)
+    response['ETag'] = image.etag
+    # Per-user images behind fixed URLs: browser cache only, and never reused without
+    # revalidating, or the next user on the same browser would get the previous one's code
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Authorization'])
+    return response
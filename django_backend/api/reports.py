@@ -0,0 +1,370 @@
+"""
+Report exports for events.
+
+CSV reports are streamed straight from the database: rows are read with
+values_list().iterator() and written with the stdlib csv module in batches,
+so memory stays constant and the first bytes go out immediately no matter
+how many participants an event has.
+
+The PDF attendance report is drawn a page at a time into a temporary file,
+which is then streamed back, so a large event never builds one huge table.
+"""
+import csv
+import tempfile
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib import colors  # type: ignore
+from reportlab.lib.pagesizes import letter  # type: ignore
+from reportlab.lib.styles import getSampleStyleSheet  # type: ignore
+from reportlab.pdfbase.pdfmetrics import stringWidth  # type: ignore
+from reportlab.pdfgen import canvas  # type: ignore
+from reportlab.platypus import Paragraph, Table, TableStyle  # type: ignore
+
+from .models import EvaluationQuestion, EvaluationTally, EventCounter, EventRollup, Participant
+
+STREAM_CHUNK_SIZE = 2000  # Rows fetched per database round trip
+ROWS_PER_WRITE = 500  # Rows joined into one chunk of the HTTP response
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+ATTENDANCE_CSV_HEADER = ['Name', 'Email', 'Status', 'Check In', 'Check Out', 'Has Evaluated', 'Quiz Passed']
+EVALUATION_CSV_HEADER = ['Name', 'Email', 'Rating', 'Instructor Rating', 'Comments', 'Submitted At']
+SUMMARY_GROUPS = ('month', 'location')
+
+
+class Echo:
+    """File-like object whose write() hands the formatted line back to the caller"""
+    def write(self, value):
+        return value
+
+
+def yes_no(value):
+    return 'Yes' if value else 'No'
+
+
+def format_datetime(value):
+    return value.strftime(DATETIME_FORMAT) if value else ''
+
+
+def attendance_csv_rows(event):
+    """Attendance report rows for every participant of an event"""
+    rows = (
+        Participant.objects.filter(event=event)
+        .order_by('id')
+        .values_list('name', 'email', 'status', 'check_in_time', 'check_out_time',
+                     'has_evaluated', 'quiz_passed')
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    for name, email, status, check_in, check_out, has_evaluated, quiz_passed in rows:
+        yield [name, email, status, format_datetime(check_in), format_datetime(check_out),
+               yes_no(has_evaluated), yes_no(quiz_passed)]
+
+
+def evaluation_csv_rows(event):
+    """Evaluation report rows for participants who submitted an evaluation"""
+    rows = (
+        Participant.objects.filter(event=event, has_evaluated=True)
+        .order_by('id')
+        .values_list('name', 'email', 'evaluation_data', 'updated_at')
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    for name, email, evaluation_data, updated_at in rows:
+        eval_data = evaluation_data or {}
+        yield [name, email, eval_data.get('rating', 'N/A'), eval_data.get('instructorRating', 'N/A'),
+               eval_data.get('comments', ''), format_datetime(updated_at)]
+
+
+def evaluation_analytics(event):
+    """Per-question distribution, mean, standard deviation and response rate.
+
+    Read from the EvaluationTally rows, so the cost depends on the number of
+    questions and distinct answers, not on the number of evaluations.
+    """
+    counters = EventCounter.totals(event.pk)
+    evaluations = counters.get(EventCounter.EVALUATED, 0)
+    tallies = {}
+    for question, answer, count in event.evaluation_tallies.filter(count__gt=0).values_list('question', 'answer', 'count'):
+        tallies.setdefault(question, {})[answer] = count
+
+    questions = list(EvaluationTally.BUILTIN_QUESTIONS) + [
+        (str(question_id), text, question_type) for question_id, text, question_type in
+        EvaluationQuestion.objects.filter(event=event).values_list('id', 'question_text', 'question_type')
+    ]
+    results = []
+    for key, label, question_type in questions:
+        answers = tallies.get(key, {})
+        distribution = {answer: count for answer, count in answers.items() if answer != EvaluationTally.TEXT}
+        responses = sum(answers.values())
+        numeric = sum(distribution.values())
+        mean = std = None
+        if numeric:
+            mean = sum(float(value) * count for value, count in distribution.items()) / numeric
+            variance = sum(count * (float(value) - mean) ** 2 for value, count in distribution.items()) / numeric
+            std = variance ** 0.5
+        results.append({
+            'key': key,
+            'label': label,
+            'type': question_type,
+            'responses': responses,
+            'response_rate': round(responses / evaluations, 4) if evaluations else 0,
+            'distribution': dict(sorted(distribution.items(), key=lambda item: float(item[0]))),
+            'text_responses': answers.get(EvaluationTally.TEXT, 0),
+            'mean': round(mean, 3) if mean is not None else None,
+            'std': round(std, 3) if std is not None else None,
+        })
+
+    return {
+        'event_id': event.pk,
+        'participants': event.participants_count,
+        'evaluations': evaluations,
+        'response_rate': round(evaluations / event.participants_count, 4) if event.participants_count else 0,
+        'questions': results,
+    }
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else 0
+
+
+def participation_summary(date_from=None, date_to=None, location=None, group_by=SUMMARY_GROUPS):
+    """Participation totals and rates across events, grouped by month and/or location.
+
+    Read from the EventRollup rows of the events in range; stale rollups among
+    them are refreshed first, which recounts only the events that changed.
+    Attendance and evaluation rates are per registration, the quiz pass rate
+    per participant who took the quiz.
+    """
+    filters = {}
+    if date_from:
+        filters['date__gte'] = date_from
+    if date_to:
+        filters['date__lte'] = date_to
+    if location is not None:
+        filters['location'] = location
+    EventRollup.refresh(EventRollup.stale_events().filter(**filters).values_list('id', flat=True))
+
+    rows = list(
+        EventRollup.objects.filter(**filters)
+        .annotate(month=TruncMonth('date'))
+        .values(*group_by)
+        .annotate(events=Count('pk'), **{name: Sum(name) for name in EventRollup.COUNTS})
+        .order_by(*group_by)
+    )
+    totals = {name: sum(row[name] for row in rows) for name in ('events', *EventRollup.COUNTS)}
+    for row in rows + [totals]:
+        if row.get('month'):
+            row['month'] = row['month'].strftime('%Y-%m')
+        row['attendance_rate'] = _ratio(row['attended'], row['registrations'])
+        row['evaluation_rate'] = _ratio(row['evaluated'], row['registrations'])
+        row['quiz_pass_rate'] = _ratio(row['quiz_passed'], row['quiz_taken'])
+
+    return {
+        'from': date_from,
+        'to': date_to,
+        'location': location,
+        'group_by': list(group_by),
+        'totals': totals,
+        'rows': rows,
+    }
+
+
+def stream_csv(header, rows, filename):
+    """StreamingHttpResponse writing a header plus rows as CSV"""
+    writer = csv.writer(Echo(), lineterminator='\n')
+
+    def generate():
+        batch = [writer.writerow(header)]
+        for row in rows:
+            batch.append(writer.writerow(row))
+            if len(batch) >= ROWS_PER_WRITE:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ---------------------------------------------------------------------------
+# PDF attendance report
+# ---------------------------------------------------------------------------
+
+PDF_MARGIN = 36
+PDF_ROW_HEIGHT = 14
+PDF_FONT_SIZE = 8
+PDF_COLUMNS = [
+    ('Name', 130), ('Email', 170), ('Status', 60), ('Check In', 45),
+    ('Check Out', 50), ('Evaluated', 50), ('Quiz', 35),
+]
+PDF_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), PDF_FONT_SIZE),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+]
+
+
+def format_time(value):
+    return value.strftime('%H:%M') if value else '-'
+
+
+def fit_text(text, width, font='Helvetica', size=PDF_FONT_SIZE):
+    """Truncate text so it fits in a fixed-width column"""
+    text = str(text or '')
+    limit = width - 6  # Cell padding
+    if stringWidth(text, font, size) <= limit:
+        return text
+    # Binary search for the longest prefix that fits with the ellipsis
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if stringWidth(text[:mid] + '...', font, size) <= limit:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + '...'
+
+
+def attendance_pdf_rows(event):
+    """Attendance table rows for the PDF report, streamed from the database"""
+    rows = (
+        Participant.objects.filter(event=event)
+        .order_by('id')
+        .values_list('name', 'email', 'status', 'check_in_time', 'check_out_time',
+                     'has_evaluated', 'quiz_passed')
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    widths = [width for _, width in PDF_COLUMNS]
+    for name, email, status, check_in, check_out, has_evaluated, quiz_passed in rows:
+        values = [name, email, status, format_time(check_in), format_time(check_out),
+                  yes_no(has_evaluated), yes_no(quiz_passed)]
+        yield [fit_text(value, width) for value, width in zip(values, widths)]
+
+
+def attendance_counts(event):
+    """Per-status and requirement totals for an event, aggregated in SQL"""
+    participants = Participant.objects.filter(event=event)
+    by_status = dict(
+        participants.values_list('status').annotate(count=Count('id')).order_by('status')
+    )
+    totals = participants.aggregate(
+        total=Count('id'),
+        evaluated=Count('id', filter=Q(has_evaluated=True)),
+        quiz_passed=Count('id', filter=Q(quiz_passed=True)),
+        certificates=Count('certificate'),
+    )
+    return by_status, totals
+
+
+class AttendancePDFReport:
+    """Draws the attendance report one page-sized table at a time.
+
+    Only one page of rows is held in memory; each page gets its own table with
+    the header row repeated, so reportlab never lays out the whole roster.
+    """
+
+    def __init__(self, event, output, summary_only=False):
+        self.event = event
+        self.summary_only = summary_only
+        self.canvas = canvas.Canvas(output, pagesize=letter)
+        self.width, self.height = letter
+        self.page = 0
+        self.styles = getSampleStyleSheet()
+
+    def build(self):
+        top = self.start_page()
+        top = self.draw_title(top)
+        top = self.draw_summary(top)
+        if not self.summary_only:
+            self.draw_rows(top)
+        self.finish_page()
+        self.canvas.save()
+
+    def start_page(self):
+        self.page += 1
+        return self.height - PDF_MARGIN
+
+    def finish_page(self):
+        c = self.canvas
+        c.setFont('Helvetica', 8)
+        c.setFillColor(colors.grey)
+        c.drawRightString(self.width - PDF_MARGIN, PDF_MARGIN / 2, f"Page {self.page}")
+        c.drawString(PDF_MARGIN, PDF_MARGIN / 2, f"Attendance Report: {self.event.title}")
+        c.showPage()
+
+    def draw_flowable(self, flowable, top):
+        available = self.width - 2 * PDF_MARGIN
+        _, flowable_height = flowable.wrapOn(self.canvas, available, top - PDF_MARGIN)
+        flowable.drawOn(self.canvas, PDF_MARGIN, top - flowable_height)
+        return top - flowable_height
+
+    def draw_title(self, top):
+        top = self.draw_flowable(Paragraph(f"Attendance Report: {self.event.title}", self.styles['Title']), top)
+        return self.draw_flowable(Paragraph(f"Date: {self.event.date}", self.styles['Normal']), top) - 12
+
+    def draw_summary(self, top):
+        by_status, totals = attendance_counts(self.event)
+        data = [['Status', 'Participants']]
+        data += [[status, count] for status, count in by_status.items()]
+        data += [
+            ['Total', totals['total']],
+            ['Evaluated', totals['evaluated']],
+            ['Quiz passed', totals['quiz_passed']],
+            ['Certificates issued', totals['certificates']],
+        ]
+        table = Table(data, colWidths=[150, 80], rowHeights=PDF_ROW_HEIGHT, hAlign='LEFT')
+        table.setStyle(TableStyle(PDF_TABLE_STYLE))
+        return self.draw_flowable(table, top) - 18
+
+    def rows_that_fit(self, top):
+        # One row is reserved for the repeated header
+        return max(int((top - PDF_MARGIN) // PDF_ROW_HEIGHT) - 1, 0)
+
+    def draw_table_page(self, rows, top):
+        header = [label for label, _ in PDF_COLUMNS]
+        table = Table(
+            [header] + rows,
+            colWidths=[width for _, width in PDF_COLUMNS],
+            rowHeights=PDF_ROW_HEIGHT,
+            repeatRows=1,
+            hAlign='LEFT',
+        )
+        table.setStyle(TableStyle(PDF_TABLE_STYLE))
+        self.draw_flowable(table, top)
+
+    def draw_rows(self, top):
+        capacity = self.rows_that_fit(top)
+        page_rows = []
+        for row in attendance_pdf_rows(self.event):
+            if capacity == 0:
+                self.finish_page()
+                top = self.start_page()
+                capacity = self.rows_that_fit(top)
+            page_rows.append(row)
+            if len(page_rows) == capacity:
+                self.draw_table_page(page_rows, top)
+                page_rows = []
+                capacity = 0
+        if page_rows:
+            self.draw_table_page(page_rows, top)
+
+
+def attendance_pdf_response(event, filename, summary_only=False):
+    """Render the attendance PDF to a temporary file and stream it back"""
+    spool = tempfile.TemporaryFile()
+    try:
+        AttendancePDFReport(event, spool, summary_only=summary_only).build()
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    # FileResponse streams the file in blocks and closes (deletes) it afterwards
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type='application/pdf')
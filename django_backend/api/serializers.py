@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Event, Participant, Certificate, EventSession, Quiz, EvaluationQuestion, UserProfile
+from .models import Event, Participant, Certificate, EventSession, Quiz, EvaluationQuestion, UserProfile, Job
 
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,6 +25,7 @@ class UserSerializer(serializers.ModelSerializer):
 class ParticipantSerializer(serializers.ModelSerializer):
     certificate = serializers.SerializerMethodField()
     is_eligible = serializers.SerializerMethodField()
+    attendance_logs = serializers.SerializerMethodField()
     
     class Meta:
         model = Participant
@@ -40,15 +41,22 @@ class ParticipantSerializer(serializers.ModelSerializer):
                     'certificate_number': cert.certificate_number,
                     'verification_code': cert.verification_code,
                     'issued_at': cert.issued_at.isoformat() if cert.issued_at else None,
-                    'emailed': cert.emailed
+                    'emailed': cert.emailed,
+                    'email_status': cert.email_status,
                 }
         except Exception as e:
             # Certificate doesn't exist yet
             pass
         return None
     
+    def get_attendance_logs(self, obj):
+        # Stored as AttendanceLog rows; list views prefetch `attendance_entries`
+        return [log.as_dict() for log in obj.attendance_entries.all()]
+    
     def get_is_eligible(self, obj):
-        return obj.is_eligible_for_certificate()
+        # Rosters and list views annotate it with ParticipantQuerySet.with_eligibility()
+        eligible = getattr(obj, 'certificate_eligible', None)
+        return obj.is_eligible_for_certificate() if eligible is None else eligible
 
 class EventSessionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -74,21 +82,69 @@ class CertificateSerializer(serializers.ModelSerializer):
         model = Certificate
         fields = '__all__'
 
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'attempts', 'max_attempts', 'run_after',
+                  'result', 'last_error', 'created_at', 'finished_at']
+        read_only_fields = fields
+
+def status_counts(event):
+    """Live per-status totals from EventCounter rows (prefetched as `counters` in list views)"""
+    return {counter.name: counter.value for counter in event.counters.all() if counter.value}
+
+
+class EventSummarySerializer(serializers.ModelSerializer):
+    """Lightweight event representation without nested collections"""
+    status_counts = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Event
+        fields = ['id', 'title', 'description', 'date', 'time_start', 'time_end', 'location',
+                  'status', 'participants_count', 'status_counts', 'requirements', 'qr_code',
+                  'is_multi_session', 'created_at', 'updated_at']
+
+    def get_status_counts(self, obj):
+        return status_counts(obj)
+
 class EventSerializer(serializers.ModelSerializer):
     participants = serializers.SerializerMethodField()
     sessions = EventSessionSerializer(many=True, read_only=True)
     quizzes = QuizSerializer(many=True, read_only=True)
     evaluation_questions = EvaluationQuestionSerializer(many=True, read_only=True)
+    status_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = ['id', 'title', 'description', 'date', 'time_start', 'time_end', 'location', 
-                  'status', 'participants_count', 'requirements', 'participants', 'qr_code',
+                  'status', 'participants_count', 'status_counts', 'requirements', 'participants', 'qr_code',
                   'certificate_template', 'speakers', 'agenda', 'is_multi_session', 'sessions',
                   'quizzes', 'evaluation_questions', 'created_at', 'updated_at']
     
+    def get_status_counts(self, obj):
+        return status_counts(obj)
+    
+    def validate_requirements(self, value):
+        """Store requirement flags as JSON booleans; eligibility is computed in SQL as well as Python"""
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of requirement flags.')
+        requirements = dict(value)
+        for name in Event.CERTIFICATE_REQUIREMENTS:
+            if requirements.get(name) is None:
+                if name in requirements:
+                    requirements[name] = False
+                continue
+            try:
+                requirements[name] = serializers.BooleanField().to_internal_value(requirements[name])
+            except serializers.ValidationError:
+                raise serializers.ValidationError({name: 'Must be true or false.'})
+        return requirements
+    
     def get_participants(self, obj):
         """Only show all participants to admins, participants see only their own"""
+        # The list/retrieve views prefetch the roster the requester may see
+        if hasattr(obj, 'visible_participants'):
+            return ParticipantSerializer(obj.visible_participants, many=True).data
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             from .permissions import is_admin
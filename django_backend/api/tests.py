@@ -0,0 +1,650 @@
+import datetime
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import checkin
+from .importers import import_participants
+from .issuance import issue_event_certificates
+from .jobs import HANDLERS, JobError, claim_next, enqueue, requeue_stale, run_job
+from .mailer import send_certificate_emails
+from .management.commands.check_query_plans import INDEX_SCAN_PATTERNS, hot_queries, prefer_index_scans, uses_index
+from .models import (
+    AttendanceLog, Certificate, EvaluationQuestion, EvaluationTally, Event, EventCounter, EventRollup, EventSession,
+    Job, Participant, Quiz,
+)
+
+
+def seed_events(events, participants):
+    """Events with a quiz, an evaluation question, a session and attended participants, half certified"""
+    for e in range(events):
+        event = Event.objects.create(title=f'Event {e}', date=datetime.date(2025, 1, 1 + e),
+                                     requirements={'evaluation': True})
+        Quiz.objects.create(event=event, question='Q', correct_answer='a')
+        EvaluationQuestion.objects.create(event=event, question_text='Q')
+        EventSession.objects.create(event=event, session_name='S', session_date=event.date,
+                                    session_start='09:00', session_end='10:00')
+        for p in range(participants):
+            participant = Participant.objects.create(event=event, name=f'P{p}', email=f'{e}-{p}@example.com',
+                                                     status='attended', has_evaluated=True)
+            if p % 2:
+                Certificate.objects.create(participant=participant)
+
+
+def counters(event):
+    """{name: value} of an event's EventCounter rows, zeros dropped"""
+    return {c.name: c.value for c in EventCounter.objects.filter(event=event) if c.value}
+
+
+class DroppedConnectionBackend(EmailBackend):
+    """A mail server that refuses every message and every reconnect"""
+
+    def open(self):
+        if getattr(self, 'opened', False):
+            raise ConnectionRefusedError('Connection refused')
+        self.opened = True
+
+    def send_messages(self, messages):
+        raise ConnectionResetError('Connection reset by peer')
+
+
+class TempMediaTestCase(TestCase):
+    """Certificate PDFs rendered by a test go to a temporary MEDIA_ROOT, not the source tree"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+
+
+class AdminClientTestCase(TempMediaTestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class EventListQueryTests(AdminClientTestCase):
+    """The event list prefetches its nested collections, so its query count is fixed"""
+
+    def test_query_count_does_not_grow_with_rows(self):
+        seed_events(2, 2)
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/events/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        seed_events(5, 8)
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/events/')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertEqual(sum(len(event['participants']) for event in response.data['results']), 44)
+
+
+class ParticipantImportTests(AdminClientTestCase):
+    ROWS = [
+        ('Ann', 'ann@example.com'),
+        ('Ann again', ' ANN@example.com '),
+        ('Ben', 'ben@example.com'),
+        ('No email', ''),
+        ('Bad', 'not-an-email'),
+        ('Cid', 'cid@example.com'),
+        (None, 'dee@example.com'),
+        ('Eve', 'Existing@Example.com'),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1))
+        Participant.objects.create(event=self.event, name='Existing', email='existing@example.com')
+
+    def test_counts_across_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = import_participants(self.event, self.ROWS, chunk_size=3)
+        self.assertEqual(result, {'created': 4, 'skipped_existing': 1, 'skipped_duplicate': 1, 'invalid': 2})
+        self.assertEqual(Participant.objects.get(event=self.event, email='dee@example.com').name, 'Anonymous')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 5)
+        self.assertEqual(counters(self.event), {'registered': 5})
+        # The counters are written once for the whole import, not per chunk
+        event_updates = [q for q in queries if q['sql'].startswith('UPDATE "api_event"')]
+        self.assertEqual(len(event_updates), 1)
+
+    def test_reimport_skips_everyone(self):
+        import_participants(self.event, self.ROWS, chunk_size=3)
+        result = import_participants(self.event, self.ROWS, chunk_size=3)
+        self.assertEqual(result, {'created': 0, 'skipped_existing': 5, 'skipped_duplicate': 1, 'invalid': 2})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participants_count, 5)
+        self.assertEqual(counters(self.event), {'registered': 5})
+
+
+@unittest.skipUnless(connection.vendor in INDEX_SCAN_PATTERNS, 'Plans are checked on SQLite and PostgreSQL')
+class QueryPlanTests(TestCase):
+    """Hot lookups stay on their indexes (same checks as manage.py check_query_plans)"""
+
+    def test_hot_queries_use_their_indexes(self):
+        # The test's transaction scopes the SET LOCAL
+        prefer_index_scans()
+        for label, queryset, index in hot_queries():
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertTrue(uses_index(plan, index), f'{index} not in plan:\n{plan}')
+
+    def test_plan_patterns(self):
+        sqlite = INDEX_SCAN_PATTERNS['sqlite'].format(index='event_date_id_idx')
+        postgresql = INDEX_SCAN_PATTERNS['postgresql'].format(index='event_date_id_idx')
+        self.assertRegex('5 0 0 SCAN api_event USING INDEX event_date_id_idx', sqlite)
+        self.assertRegex('Index Scan Backward using event_date_id_idx on api_event', postgresql)
+        self.assertRegex('Index Only Scan using event_date_id_idx on api_event', postgresql)
+        self.assertRegex('  ->  Bitmap Index Scan on event_date_id_idx', postgresql)
+        self.assertNotRegex('Seq Scan on api_event', postgresql)
+        self.assertNotRegex('Index Scan using event_date_id_idx_old on api_event', postgresql)
+
+
+class QRImageCachingTests(AdminClientTestCase):
+    """QR URLs are not content-addressed, so browsers must revalidate them"""
+
+    def test_revalidated_and_varies_by_user(self):
+        response = self.client.get('/api/auth/me/qr/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn('Authorization', response['Vary'])
+
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        client = APIClient()
+        client.force_authenticate(other)
+        # The first user's ETag does not match the second user's image
+        response_other = client.get('/api/auth/me/qr/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response_other.status_code, 200)
+        self.assertNotEqual(response_other['ETag'], response['ETag'])
+
+        response = self.client.get('/api/auth/me/qr/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_event_qr_revalidates_after_code_change(self):
+        event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1))
+        first = self.client.get(f'/api/events/{event.id}/qr_code/')
+        Event.objects.filter(pk=event.pk).update(qr_code='EVENT-NEW')
+        response = self.client.get(f'/api/events/{event.id}/qr_code/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+
+class ScanTestCase(AdminClientTestCase):
+    """An event with one registered attendee and one account that did not register"""
+
+    def setUp(self):
+        super().setUp()
+        # The check-in index is process-wide; rows it cached were rolled back with the last test
+        checkin.invalidate()
+        self.addCleanup(checkin.invalidate)
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1))
+        self.attendee = User.objects.create_user('ann', 'ann@example.com', 'pw', first_name='Ann')
+        self.participant = Participant.objects.create(event=self.event, user=self.attendee, name='Ann',
+                                                      email='ann@example.com')
+        self.walk_in = User.objects.create_user('ben', 'ben@example.com', 'pw', first_name='Ben')
+
+    def scan(self, user):
+        return self.client.post('/api/scan/qr/', {'event_id': self.event.id, 'qr_data': user.profile.qr_code})
+
+
+class QRCheckInTests(ScanTestCase):
+    def test_registered_attendee_from_index(self):
+        checkin.get_index(self.event.id)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.scan(self.attendee)
+        # Resolved from the index: no profile or participant lookups, one conditional UPDATE
+        sql = [q['sql'] for q in queries]
+        self.assertFalse([q for q in sql if 'api_userprofile' in q or q.startswith('SELECT "api_participant"')])
+        self.assertEqual(len([q for q in sql if q.startswith('UPDATE "api_participant"')]), 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['participant']['id'], self.participant.id)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.status, 'attended')
+        self.assertEqual(AttendanceLog.objects.filter(participant=self.participant).count(), 1)
+
+    def test_walk_in_registered_and_indexed(self):
+        response = self.scan(self.walk_in)
+        self.assertEqual(response.status_code, 200)
+        participant = Participant.objects.get(event=self.event, user=self.walk_in)
+        self.assertEqual((participant.status, participant.name), ('attended', 'Ben'))
+        self.assertEqual(checkin.get_index(self.event.id).codes[self.walk_in.profile.qr_code].participant_id,
+                         participant.id)
+
+    def test_index_follows_code_changes(self):
+        old_code = self.attendee.profile.qr_code
+        checkin.get_index(self.event.id)
+        self.attendee.profile.qr_code = 'USER-NEW-CODE'
+        self.attendee.profile.save()
+        response = self.client.post('/api/scan/qr/', {'event_id': self.event.id, 'qr_data': old_code})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/scan/qr/', {'event_id': self.event.id, 'qr_data': 'USER-NEW-CODE'})
+        self.assertEqual(response.data['participant']['id'], self.participant.id)
+
+    def test_unknown_code_and_event(self):
+        response = self.client.post('/api/scan/qr/', {'event_id': self.event.id, 'qr_data': 'USER-0-NOPE'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post('/api/scan/qr/', {'event_id': 0, 'qr_data': self.attendee.profile.qr_code})
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchScanTests(ScanTestCase):
+    def sync(self, scans):
+        return self.client.post('/api/scan/batch/', {'scans': scans}, format='json')
+
+    def queued(self, user, minute, **extra):
+        return {'qr_data': user.profile.qr_code, 'event_id': self.event.id, 'device_id': 'kiosk-1',
+                'scanned_at': f'2025-01-01T09:{minute:02d}:00Z', **extra}
+
+    def test_resent_queue_is_idempotent(self):
+        scans = [
+            self.queued(self.attendee, 5, idempotency_key='k-1'),
+            self.queued(self.walk_in, 6),
+            {'qr_data': 'EVENT-1', 'event_id': self.event.id, 'scanned_at': '2025-01-01T09:07:00Z'},
+            self.queued(self.attendee, 8, event_id=0),
+        ]
+        response = self.sync(scans)
+        self.assertEqual((response.data['checked_in'], response.data['duplicates'], response.data['failed']),
+                         (2, 0, 2))
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['checked_in', 'checked_in', 'invalid', 'not_found'])
+
+        # The kiosk did not see the response and sends its whole queue again
+        response = self.sync(scans)
+        self.assertEqual((response.data['checked_in'], response.data['duplicates']), (0, 2))
+        self.assertEqual(AttendanceLog.objects.filter(event=self.event).count(), 2)
+        self.assertEqual(Participant.objects.filter(event=self.event).count(), 2)
+
+    def test_keys_distinguish_scans(self):
+        # Derived keys include scanned_at, so a second visit is a new check-in
+        response = self.sync([self.queued(self.attendee, 5), self.queued(self.attendee, 50)])
+        self.assertEqual(response.data['checked_in'], 2)
+        # The same client key from another kiosk is still one scan
+        response = self.sync([self.queued(self.attendee, 55, idempotency_key='k-9'),
+                              self.queued(self.attendee, 56, idempotency_key='k-9', device_id='kiosk-2')])
+        self.assertEqual([r['status'] for r in response.data['results']], ['checked_in', 'duplicate'])
+
+    def test_late_sync_does_not_move_check_in_back(self):
+        self.sync([self.queued(self.attendee, 30)])
+        self.sync([self.queued(self.attendee, 10)])
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.check_in_time.minute, 30)
+
+
+class AttendanceLogTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1), is_multi_session=True)
+        self.session = EventSession.objects.create(event=self.event, session_name='AM', session_date=self.event.date,
+                                                   session_start='09:00', session_end='12:00')
+        self.participant = Participant.objects.create(event=self.event, name='P', email='p@example.com')
+        self.url = f'/api/participants/{self.participant.id}/mark_attendance/'
+
+    def test_check_in_and_out_append_rows(self):
+        self.client.post(self.url, {'type': 'in', 'session': self.session.id})
+        response = self.client.post(self.url, {'type': 'out', 'session': self.session.id})
+        self.assertEqual(response.status_code, 200)
+        # Serialized in the shape of the former JSON list
+        self.assertEqual([(log['type'], log['session'], log['scanned_by']) for log in response.data['attendance_logs']],
+                         [('check_in', self.session.id, 'admin'), ('check_out', self.session.id, 'admin')])
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.status, 'attended')
+        self.assertIsNotNone(self.participant.check_out_time)
+
+    def test_session_of_another_event_rejected(self):
+        other = Event.objects.create(title='Other', date=datetime.date(2025, 1, 2))
+        session = EventSession.objects.create(event=other, session_name='AM', session_date=other.date,
+                                              session_start='09:00', session_end='12:00')
+        response = self.client.post(self.url, {'type': 'in', 'session': session.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AttendanceLog.objects.exists())
+
+    def test_idempotency_key_unique_per_participant(self):
+        AttendanceLog.objects.create(event=self.event, participant=self.participant, idempotency_key='k')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AttendanceLog.objects.create(event=self.event, participant=self.participant, idempotency_key='k')
+
+
+class EventCounterTests(ScanTestCase):
+    """Counters move with every write path and always match a recount"""
+
+    def assertCounts(self, expected, participants_count):
+        self.event.refresh_from_db()
+        self.assertEqual(counters(self.event), expected)
+        self.assertEqual({k: v for k, v in EventCounter.actual(self.event.id).items() if v}, expected)
+        self.assertEqual(self.event.participants_count, participants_count)
+
+    def test_scan_batch_and_delete(self):
+        self.assertCounts({'registered': 1}, 1)
+        self.scan(self.attendee)
+        self.assertCounts({'attended': 1}, 1)
+        self.scan(self.attendee)  # Already attended: nothing moves
+        self.assertCounts({'attended': 1}, 1)
+
+        late = User.objects.create_user('cid', 'cid@example.com', 'pw')
+        Participant.objects.create(event=self.event, user=late, name='Cid', email='cid@example.com',
+                                   has_evaluated=True)
+        self.assertCounts({'registered': 1, 'attended': 1, 'evaluated': 1}, 2)
+        self.client.post('/api/scan/batch/', {'scans': [
+            {'qr_data': user.profile.qr_code, 'event_id': self.event.id, 'scanned_at': '2025-01-01T09:00:00Z'}
+            for user in (self.walk_in, late)
+        ]}, format='json')
+        self.assertCounts({'attended': 3, 'evaluated': 1}, 3)
+
+        Participant.objects.get(user=late).delete()
+        self.assertCounts({'attended': 2}, 2)
+        self.client.delete(f'/api/participants/{self.participant.id}/')
+        self.assertCounts({'attended': 1}, 1)
+        self.assertEqual(EventCounter.reconcile(self.event), {})
+
+
+class ResponseCacheTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1))
+        self.participant = Participant.objects.create(event=self.event, name='Ann', email='ann@example.com')
+        self.certificate = Certificate.objects.create(participant=self.participant)
+
+    def test_event_detail_cached_until_event_changes(self):
+        url = f'/api/events/{self.event.id}/'
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.participant.name = 'Ann B'
+            self.participant.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['participants'][0]['name'], 'Ann B')
+
+    def test_verification_cached_and_invalidated(self):
+        client = APIClient()
+        url = f'/api/certificates/verify/?code={self.certificate.verification_code}'
+        self.assertTrue(client.get(url).data['valid'])
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(url).data['participant']['name'], 'Ann')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.participant.name = 'Ann B'
+            self.participant.save()
+        self.assertEqual(client.get(url).data['participant']['name'], 'Ann B')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certificate.delete()
+        self.assertFalse(client.get(url).data['valid'])
+
+    def test_invalid_code_not_cached(self):
+        client = APIClient()
+        self.assertFalse(client.get('/api/certificates/verify/?code=VERIFY-LATER').data['valid'])
+        other = Participant.objects.create(event=self.event, name='Ben', email='ben@example.com')
+        Certificate.objects.create(participant=other, verification_code='VERIFY-LATER')
+        self.assertTrue(client.get('/api/certificates/verify/?code=VERIFY-LATER').data['valid'])
+
+
+class QuizGradingTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1))
+        self.q1 = Quiz.objects.create(event=self.event, question='Capital of France?', correct_answer='Paris')
+        self.q2 = Quiz.objects.create(event=self.event, question='2 + 2?', correct_answer='4', order=1)
+        self.participant = Participant.objects.create(event=self.event, name='P', email='p@example.com')
+
+    def submit(self, participant, answers):
+        return self.client.post(f'/api/participants/{participant.id}/submit_quiz/', {'answers': answers},
+                                format='json')
+
+    def test_answer_key_recompiled_on_quiz_changes(self):
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quiz_answer_key['answers'], ['paris', '4'])
+        self.q2.correct_answer = ' Four '
+        self.q2.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quiz_answer_key['answers'], ['paris', 'four'])
+        self.q1.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quiz_answer_key['ids'], [self.q2.id])
+        self.assertEqual(self.event.quiz_answer_key['max_points'], 1)
+
+    def test_submission_graded_against_key(self):
+        response = self.submit(self.participant, {str(self.q1.id): ' paris ', str(self.q2.id): '5'})
+        self.assertEqual((response.data['score'], response.data['passed'], response.data['correct']), (50, False, 1))
+
+    def test_regrade_after_answer_fix(self):
+        other = Participant.objects.create(event=self.event, name='Q', email='q@example.com')
+        self.submit(self.participant, {str(self.q1.id): 'Paris', str(self.q2.id): 'four'})
+        self.submit(other, {str(self.q1.id): 'Paris', str(self.q2.id): '4'})
+        self.q2.correct_answer = 'four'
+        self.q2.save()
+
+        response = self.client.post(f'/api/events/{self.event.id}/regrade_quizzes/')
+        self.assertEqual(response.data, {'regraded': 2, 'passed': 1})
+        self.participant.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.participant.quiz_score, self.participant.quiz_passed), (100, True))
+        self.assertEqual((other.quiz_score, other.quiz_passed), (50, False))
+        self.assertEqual(self.participant.quiz_data['results'][str(self.q2.id)]['correct_answer'], 'four')
+
+
+class EvaluationAnalyticsTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1), status='completed')
+        self.question = EvaluationQuestion.objects.create(event=self.event, question_text='Pace', question_type='rating')
+        self.participants = [
+            Participant.objects.create(event=self.event, name=f'P{i}', email=f'{i}@example.com', status='attended')
+            for i in range(4)
+        ]
+
+    def evaluate(self, participant, **answers):
+        return self.client.post(f'/api/participants/{participant.id}/submit_evaluation/',
+                                {'evaluation_data': answers}, format='json')
+
+    def stats(self, analytics, key):
+        return next(q for q in analytics['questions'] if q['key'] == key)
+
+    def test_distribution_from_tallies(self):
+        pace = str(self.question.id)
+        self.evaluate(self.participants[0], rating=5, comments='Great', **{pace: 2})
+        self.evaluate(self.participants[1], rating='4', comments='')
+        self.evaluate(self.participants[2], rating=3)
+        self.assertEqual(self.evaluate(self.participants[2], rating=1).status_code, 400)  # Counted once
+
+        with self.assertNumQueries(4):
+            analytics = self.client.get(f'/api/reports/evaluation/{self.event.id}/analytics/').data
+        self.assertEqual((analytics['evaluations'], analytics['response_rate']), (3, 0.75))
+        rating = self.stats(analytics, 'rating')
+        self.assertEqual(rating['distribution'], {'3': 1, '4': 1, '5': 1})
+        self.assertEqual((rating['mean'], rating['std'], rating['response_rate']), (4.0, 0.816, 1.0))
+        comments = self.stats(analytics, 'comments')
+        self.assertEqual((comments['responses'], comments['text_responses'], comments['mean']), (1, 1, None))
+        self.assertEqual(self.stats(analytics, pace)['distribution'], {'2': 1})
+
+        self.client.delete(f'/api/participants/{self.participants[0].id}/')
+        analytics = self.client.get(f'/api/reports/evaluation/{self.event.id}/analytics/').data
+        self.assertEqual(self.stats(analytics, 'rating')['distribution'], {'3': 1, '4': 1})
+        self.assertEqual(self.stats(analytics, 'comments')['responses'], 0)
+        self.assertEqual(EvaluationTally.reconcile(self.event), {})
+
+
+class EventRollupTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        self.march = Event.objects.create(title='A', date=datetime.date(2025, 3, 3), location='Hall')
+        self.april = Event.objects.create(title='B', date=datetime.date(2025, 4, 4), location='Hall')
+        for i, status in enumerate(['attended', 'attended', 'registered']):
+            Participant.objects.create(event=self.march, name='P', email=f'{i}@example.com', status=status,
+                                       quiz_score=80 if i else None, quiz_passed=bool(i))
+
+    def summary(self, **params):
+        return self.client.get('/api/reports/summary/', params).data
+
+    def test_summary_refreshes_only_stale_rollups(self):
+        self.assertEqual(set(EventRollup.stale_events()), {self.march, self.april})  # No rows yet
+        data = self.summary(group_by='month')
+        self.assertEqual([(row['month'], row['registrations'], row['attended']) for row in data['rows']],
+                         [('2025-03', 3, 2), ('2025-04', 0, 0)])
+        self.assertEqual((data['totals']['attendance_rate'], data['totals']['quiz_pass_rate']), (0.6667, 1.0))
+        self.assertFalse(EventRollup.stale_events().exists())
+
+        # Changes mark the rollup stale once committed; the next read recounts that event only
+        with self.captureOnCommitCallbacks(execute=True):
+            Participant.objects.create(event=self.april, name='Q', email='q@example.com', status='attended')
+        self.assertEqual(list(EventRollup.stale_events()), [self.april])
+        self.assertEqual(self.summary(group_by='month')['rows'][1]['attended'], 1)
+        refreshed = EventRollup.objects.get(event=self.march).refreshed_at
+        self.summary()
+        self.assertEqual(EventRollup.objects.get(event=self.march).refreshed_at, refreshed)
+
+    def test_filters_and_grouping(self):
+        data = self.summary(**{'from': '2025-04-01', 'group_by': 'location'})
+        self.assertEqual([(row['location'], row['events']) for row in data['rows']], [('Hall', 1)])
+        self.assertEqual(self.client.get('/api/reports/summary/', {'group_by': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/summary/', {'from': 'March'}).status_code, 400)
+
+
+class CertificateIssuanceTests(AdminClientTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.create(title='E', date=datetime.date(2025, 1, 1), status='completed')
+        self.participant = Participant.objects.create(event=self.event, name='P', email='p@example.com',
+                                                      status='attended')
+
+    def test_send_email_strings_from_form_clients(self):
+        for value, expected in (('false', False), ('0', False), ('true', True), ('1', True)):
+            response = self.client.post(f'/api/events/{self.event.id}/issue_certificates/', {'send_email': value})
+            self.assertEqual(response.status_code, 202)
+            self.assertIs(Job.objects.get(pk=response.data['job']['id']).payload['send_email'], expected)
+        response = self.client.post(f'/api/events/{self.event.id}/issue_certificates/', {'send_email': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(f'/api/participants/{self.participant.id}/issue_certificate/', {'send_email': 'false'})
+        self.assertEqual(response.status_code, 202)
+        self.assertIs(Job.objects.get(pk=response.data['job']['id']).payload['send_email'], False)
+
+    def test_bulk_completion_bumps_updated_at(self):
+        Participant.objects.filter(pk=self.participant.pk).update(
+            updated_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        issue_event_certificates(self.event, send_email=False, workers=1)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.status, 'completed')
+        self.assertGreater(self.participant.updated_at.year, 2020)
+
+
+class CertificateEligibilityTests(AdminClientTestCase):
+    """The SQL eligibility annotation agrees with Participant.is_eligible_for_certificate()"""
+
+    REQUIREMENTS = [
+        {},
+        {'attendance': False},
+        {'attendance': 'false'},
+        {'attendance': 0},
+        {'attendance': None},
+        {'evaluation': 1},
+        {'evaluation': 'true', 'attendance': 'no'},
+        {'quiz': 'yes'},
+        {'quiz': True, 'evaluation': True, 'attendance': True},
+    ]
+
+    def test_sql_matches_python(self):
+        for requirements in self.REQUIREMENTS:
+            response = self.client.post('/api/events/', {
+                'title': 'E', 'date': '2025-01-01', 'requirements': requirements,
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+            event = Event.objects.get(pk=response.data['id'])
+            self.assertTrue(all(isinstance(flag, bool) for flag in event.requirements.values()))
+            for status in ('registered', 'attended'):
+                for has_evaluated in (False, True):
+                    for quiz_passed in (False, True):
+                        Participant.objects.create(
+                            event=event, name='P', email=f'{status}-{has_evaluated}-{quiz_passed}@example.com',
+                            status=status, has_evaluated=has_evaluated, quiz_passed=quiz_passed,
+                        )
+            for participant in Participant.objects.filter(event=event).with_eligibility():
+                with self.subTest(requirements=requirements, participant=participant.email):
+                    self.assertEqual(participant.certificate_eligible, participant.is_eligible_for_certificate())
+
+    def test_invalid_flag_rejected(self):
+        response = self.client.post('/api/events/', {
+            'title': 'E', 'date': '2025-01-01', 'requirements': {'quiz': 'maybe'},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CertificateEmailTests(TempMediaTestCase):
+    def test_failed_reconnect_marks_rest_of_batch(self):
+        seed_events(1, 6)
+        certificates = list(Certificate.objects.select_related('participant__event').order_by('pk'))
+        with self.settings(EMAIL_BACKEND='api.tests.DroppedConnectionBackend'):
+            with self.assertRaises(ConnectionRefusedError), self.assertLogs('api.mailer', 'WARNING'):
+                send_certificate_emails(certificates, rate=0)
+        first, *rest = Certificate.objects.order_by('pk')
+        self.assertEqual((first.email_status, first.email_error), (Certificate.EMAIL_FAILED, 'Connection reset by peer'))
+        for certificate in rest:
+            self.assertEqual(certificate.email_status, Certificate.EMAIL_FAILED)
+            self.assertEqual(certificate.email_error, 'Mail connection lost: Connection refused')
+
+
+def flaky_job(fail=False):
+    if fail:
+        raise JobError('Mail server down')
+    return {'ok': True}
+
+
+@mock.patch.dict(HANDLERS, {'flaky': flaky_job})
+class JobQueueTests(TestCase):
+    def test_claims_only_due_jobs_once(self):
+        later = enqueue('flaky')
+        Job.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(hours=1))
+        due = enqueue('flaky')
+        job = claim_next('worker-1')
+        self.assertEqual(job.pk, due.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_RUNNING, 1, 'worker-1'))
+        self.assertIsNone(claim_next('worker-2'))
+
+        job = run_job(job)
+        self.assertEqual((job.status, job.result), (Job.STATUS_SUCCEEDED, {'ok': True}))
+
+    def test_retried_with_backoff_then_dead(self):
+        enqueue('flaky', {'fail': True}, max_attempts=2)
+        with self.assertLogs('api.jobs', 'WARNING'):
+            job = run_job(claim_next('worker'))
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('Mail server down', job.last_error)
+        self.assertIsNone(claim_next('worker'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('api.jobs', 'ERROR'):
+            job = run_job(claim_next('worker'))
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DEAD, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_running_jobs_requeued(self):
+        stale, fresh = enqueue('flaky'), enqueue('flaky')
+        claim_next('crashed'), claim_next('alive')
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(minutes=30))
+        self.assertEqual(requeue_stale(timeout=600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), (Job.STATUS_QUEUED, ''))
+        self.assertEqual(fresh.status, Job.STATUS_RUNNING)
+        self.assertEqual(claim_next('worker').pk, stale.pk)
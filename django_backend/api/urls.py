@@ -1,22 +1,29 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    EventViewSet, ParticipantViewSet, CertificateViewSet,
-    login_view, me, register_view, reports_attendance, 
-    reports_evaluation, scan_qr_code
+    EventViewSet, ParticipantViewSet, CertificateViewSet, JobViewSet,
+    login_view, me, my_qr_code, register_view, reports_attendance, 
+    reports_evaluation, reports_evaluation_analytics, reports_summary, scan_qr_code, scan_qr_batch, metrics
 )
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='events')
 router.register(r'participants', ParticipantViewSet, basename='participants')
 router.register(r'certificates', CertificateViewSet, basename='certificates')
+router.register(r'jobs', JobViewSet, basename='jobs')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', login_view, name='api-login'),
     path('auth/register/', register_view, name='api-register'),
     path('auth/me/', me, name='api-me'),
+    path('auth/me/qr/', my_qr_code, name='api-me-qr'),
     path('reports/attendance/<int:event_id>/', reports_attendance, name='reports-attendance'),
     path('reports/evaluation/<int:event_id>/', reports_evaluation, name='reports-evaluation'),
+    path('reports/evaluation/<int:event_id>/analytics/', reports_evaluation_analytics,
+         name='reports-evaluation-analytics'),
+    path('reports/summary/', reports_summary, name='reports-summary'),
     path('scan/qr/', scan_qr_code, name='scan-qr'),
+    path('scan/batch/', scan_qr_batch, name='scan-batch'),
+    path('metrics/', metrics, name='metrics'),
 ]
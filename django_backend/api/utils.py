@@ -13,17 +13,26 @@ from PIL import Image as PILImage
 import os
 from django.conf import settings
 
-def generate_qr_code(data, size=200):
-    """Generate QR code image from data"""
+def qr_matrix(data, border=4):
+    """Module matrix for a QR code (True = dark), including the quiet-zone border"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=10,
-        border=4,
+        border=border,
     )
     qr.add_data(data)
     qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
+    return qr.get_matrix()
+
+def generate_qr_code(data, size=200):
+    """Generate QR code image from data"""
+    matrix = qr_matrix(data)
+    modules = len(matrix)
+    # One pixel per module, scaled up to 10px boxes without resampling blur
+    img = PILImage.new('1', (modules, modules), 1)
+    img.putdata([0 if dark else 1 for row in matrix for dark in row])
+    img = img.resize((modules * 10, modules * 10), PILImage.Resampling.NEAREST)
     
     # Convert to bytes
     buffer = io.BytesIO()
@@ -31,16 +40,69 @@ def generate_qr_code(data, size=200):
     buffer.seek(0)
     return buffer
 
-def generate_certificate_pdf(certificate, template_config=None):
-    """Generate beautiful PDF certificate for participant"""
+def qr_runs(matrix):
+    """(x, y, width) of each horizontal run of dark modules, in module units.
+    
+    Rows are counted from the bottom so the runs can be placed with a single
+    transform.
+    """
+    modules = len(matrix)
+    runs = []
+    for row_idx, row in enumerate(matrix):
+        row_y = modules - row_idx - 1
+        col = 0
+        while col < modules:
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < modules and row[col]:
+                col += 1
+            runs.append((start, row_y, col - start))
+    return runs
+
+def draw_qr_code(c, data, x, y, size):
+    """Draw a QR code straight onto a canvas as vector rectangles.
+    
+    The modules are filled as a single path in module units, scaled into
+    place with one transform, so no image is encoded, resampled or embedded.
+    """
+    matrix = qr_matrix(data)
+    scale = size / len(matrix)
+    c.saveState()
+    c.translate(x, y)
+    c.scale(scale, scale)
+    c.setFillColor(colors.black)
+    path = c.beginPath()
+    for run_x, run_y, run_width in qr_runs(matrix):
+        path.rect(run_x, run_y, run_width, 1)
+    c.drawPath(path, stroke=0, fill=1)
+    c.restoreState()
+
+def certificate_context(certificate):
+    """Plain values drawn on a certificate (picklable, so PDFs can render in worker processes)"""
     participant = certificate.participant
     event = participant.event
-    
-    # Create PDF in memory
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
+    issued_at = certificate.issued_at or timezone.now()
+    return {
+        'name': participant.name,
+        'event_title': event.title,
+        'event_date': str(event.date) if event.date else '',
+        'verification_code': certificate.verification_code,
+        'certificate_number': certificate.certificate_number,
+        'issued_date': issued_at.strftime("%B %d, %Y"),
+    }
+
+def generate_certificate_pdf(certificate, template_config=None):
+    """Generate beautiful PDF certificate for participant"""
+    return render_certificate_pdf(certificate_context(certificate))
+
+def render_certificate_pdf_bytes(context):
+    """Process-pool entry point: render a certificate context to PDF bytes"""
+    return render_certificate_pdf(context).getvalue()
+
+def draw_certificate_artwork(c, width, height):
+    """Static layer shared by every certificate: borders, headings and footer"""
     # Draw decorative border
     border_width = 0.5 * cm
     c.setStrokeColor(colors.HexColor('#1e40af'))
@@ -86,12 +148,42 @@ def generate_certificate_pdf(certificate, template_config=None):
     c.setFillColor(colors.HexColor('#64748b'))
     c.drawCentredString(width/2, title_y - 3*cm, "This is to certify that")
     
+    # Event details lead-in
+    c.setFont("Helvetica", 14)
+    c.setFillColor(colors.HexColor('#475569'))
+    detail_y = title_y - 6.5*cm
+    c.drawCentredString(width/2, detail_y, "has successfully completed the")
+    
+    # Footer decorative line
+    c.setStrokeColor(colors.HexColor('#3b82f6'))
+    c.setLineWidth(0.1 * cm)
+    c.line(3*cm, 2.5*cm, width - 3*cm, 2.5*cm)
+    
+    # Organization name
+    c.setFont("Helvetica-Bold", 12)
+    c.setFillColor(colors.HexColor('#1e40af'))
+    c.drawCentredString(width/2, 1.5*cm, "VPAA Event Coordination System")
+
+def render_certificate_pdf(context):
+    """Draw a certificate from certificate_context() values"""
+    # Create PDF in memory
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    
+    # Isolate the artwork's colours and line widths from the variable layer
+    c.saveState()
+    draw_certificate_artwork(c, width, height)
+    c.restoreState()
+    
+    title_y = height - 4*cm
+    
     # Participant name with underline
     c.setFont("Helvetica-Bold", 28)
     c.setFillColor(colors.HexColor('#0f172a'))
     name_y = title_y - 4.5*cm
-    name_width = c.stringWidth(participant.name, "Helvetica-Bold", 28)
-    c.drawCentredString(width/2, name_y, participant.name)
+    name_width = c.stringWidth(context['name'], "Helvetica-Bold", 28)
+    c.drawCentredString(width/2, name_y, context['name'])
     # Underline
     c.setStrokeColor(colors.HexColor('#3b82f6'))
     c.setLineWidth(0.15 * cm)
@@ -99,165 +191,36 @@ def generate_certificate_pdf(certificate, template_config=None):
            (width + name_width)/2 + 0.5*cm, name_y - 0.3*cm)
     
     # Event details
-    c.setFont("Helvetica", 14)
-    c.setFillColor(colors.HexColor('#475569'))
     detail_y = name_y - 2*cm
-    c.drawCentredString(width/2, detail_y, "has successfully completed the")
     c.setFont("Helvetica-Bold", 16)
     c.setFillColor(colors.HexColor('#1e40af'))
-    c.drawCentredString(width/2, detail_y - 0.8*cm, event.title)
+    c.drawCentredString(width/2, detail_y - 0.8*cm, context['event_title'])
     
-    if event.date:
+    if context['event_date']:
         c.setFont("Helvetica", 12)
         c.setFillColor(colors.HexColor('#64748b'))
-        c.drawCentredString(width/2, detail_y - 1.8*cm, f"held on {event.date}")
+        c.drawCentredString(width/2, detail_y - 1.8*cm, f"held on {context['event_date']}")
     
-    # QR Code for verification
-    qr_data = certificate.verification_code
-    qr_img_buffer = generate_qr_code(qr_data, size=120)
-    qr_img_buffer.seek(0)
-    # Use PIL to open and convert QR code
-    qr_pil = PILImage.open(qr_img_buffer)
-    # Resize QR code (2cm = ~56.7 points at 72 DPI)
-    qr_size_points = 2 * cm  # reportlab uses points, 1cm = 28.35 points
-    qr_pil = qr_pil.resize((int(qr_size_points), int(qr_size_points)), PILImage.Resampling.LANCZOS)
-    qr_buffer = io.BytesIO()
-    qr_pil.save(qr_buffer, format='PNG')
-    qr_buffer.seek(0)
-    # Use reportlab's Image from platypus for canvas
-    from reportlab.lib.utils import ImageReader  # type: ignore
-    qr_image_reader = ImageReader(qr_buffer)
+    # QR Code for verification (2cm square, reportlab uses points, 1cm = 28.35 points)
+    qr_size_points = 2 * cm
     qr_x = width/2 - qr_size_points/2
     qr_y = 4*cm
-    c.drawImage(qr_image_reader, qr_x, qr_y, width=qr_size_points, height=qr_size_points)
+    draw_qr_code(c, context['verification_code'], qr_x, qr_y, qr_size_points)
     
     # Verification code
     c.setFont("Helvetica", 9)
     c.setFillColor(colors.HexColor('#94a3b8'))
-    c.drawCentredString(width/2, qr_y - 0.5*cm, f"Verification: {certificate.verification_code}")
+    c.drawCentredString(width/2, qr_y - 0.5*cm, f"Verification: {context['verification_code']}")
     
     # Certificate number
     c.setFont("Helvetica", 9)
-    c.drawCentredString(width/2, qr_y - 0.9*cm, f"Certificate No: {certificate.certificate_number}")
+    c.drawCentredString(width/2, qr_y - 0.9*cm, f"Certificate No: {context['certificate_number']}")
     
     # Date issued
-    issued_date = certificate.issued_at.strftime("%B %d, %Y") if certificate.issued_at else timezone.now().strftime("%B %d, %Y")
     c.setFont("Helvetica", 9)
-    c.drawCentredString(width/2, qr_y - 1.3*cm, f"Issued on {issued_date}")
-    
-    # Footer decorative line
-    c.setStrokeColor(colors.HexColor('#3b82f6'))
-    c.setLineWidth(0.1 * cm)
-    c.line(3*cm, 2.5*cm, width - 3*cm, 2.5*cm)
-    
-    # Organization name
-    c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.HexColor('#1e40af'))
-    c.drawCentredString(width/2, 1.5*cm, "VPAA Event Coordination System")
+    c.drawCentredString(width/2, qr_y - 1.3*cm, f"Issued on {context['issued_date']}")
     
     c.save()
     buffer.seek(0)
     return buffer
 
-def send_certificate_email(certificate):
-    """Send certificate via email"""
-    try:
-        from sendgrid import SendGridAPIClient  # type: ignore
-        from sendgrid.helpers.mail import Mail  # type: ignore
-        import os
-        
-        participant = certificate.participant
-        event = participant.event
-        
-        # Generate PDF
-        pdf_buffer = generate_certificate_pdf(certificate)
-        pdf_buffer.seek(0)
-        
-        # Get SendGrid API key from environment
-        sg_api_key = os.environ.get('SENDGRID_API_KEY')
-        if not sg_api_key:
-            # Fallback to SMTP if SendGrid not configured
-            return send_certificate_email_smtp(certificate, pdf_buffer)
-        
-        message = Mail(
-            from_email=os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@vpaa.edu'),
-            to_emails=participant.email,
-            subject=f'Your Certificate: {event.title}',
-            html_content=f'''
-            <html>
-            <body>
-                <h2>Congratulations, {participant.name}!</h2>
-                <p>You have successfully completed <strong>{event.title}</strong>.</p>
-                <p>Your certificate is attached to this email.</p>
-                <p>Verification Code: <strong>{certificate.verification_code}</strong></p>
-                <p>You can verify your certificate using the QR code on the document.</p>
-                <br>
-                <p>Best regards,<br>VPAA Event Coordination System</p>
-            </body>
-            </html>
-            '''
-        )
-        
-        # Attach PDF
-        message.attachment = pdf_buffer.read()
-        message.attachment.filename = f'Certificate_{certificate.certificate_number}.pdf'
-        message.attachment.type = 'application/pdf'
-        
-        sg = SendGridAPIClient(sg_api_key)
-        response = sg.send(message)
-        
-        certificate.emailed = True
-        certificate.emailed_at = timezone.now()
-        certificate.save()
-        
-        return True
-    except Exception as e:
-        print(f"SendGrid email error: {e}")
-        # Fallback to SMTP
-        return send_certificate_email_smtp(certificate, pdf_buffer)
-
-def send_certificate_email_smtp(certificate, pdf_buffer=None):
-    """Fallback SMTP email sending"""
-    try:
-        from django.core.mail import EmailMessage
-        
-        if pdf_buffer is None:
-            pdf_buffer = generate_certificate_pdf(certificate)
-            pdf_buffer.seek(0)
-        
-        participant = certificate.participant
-        event = participant.event
-        
-        pdf_content = pdf_buffer.read()
-        pdf_buffer.seek(0)
-        
-        email = EmailMessage(
-            subject=f'Your Certificate: {event.title}',
-            body=f'''
-            Congratulations, {participant.name}!
-            
-            You have successfully completed {event.title}.
-            Your certificate is attached to this email.
-            
-            Verification Code: {certificate.verification_code}
-            
-            Best regards,
-            VPAA Event Coordination System
-            ''',
-            from_email=os.environ.get('EMAIL_FROM', 'noreply@vpaa.edu'),
-            to=[participant.email],
-        )
-        
-        email.attach(f'Certificate_{certificate.certificate_number}.pdf', 
-                    pdf_content, 'application/pdf')
-        email.send()
-        
-        certificate.emailed = True
-        certificate.emailed_at = timezone.now()
-        certificate.save()
-        
-        return True
-    except Exception as e:
-        print(f"SMTP email error: {e}")
-        return False
-
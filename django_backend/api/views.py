@@ -1,31 +1,117 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.http import HttpResponse, FileResponse
-from django.db.models import Q
-import pandas as pd
-import io
-from .models import Event, Participant, Certificate, EventSession, Quiz, EvaluationQuestion, UserProfile
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Q, Prefetch
+from django.conf import settings
+from collections import Counter
+from .models import (
+    Event, Participant, Certificate, EventSession, Quiz, EvaluationQuestion, UserProfile, Job,
+    AttendanceLog, EvaluationTally
+)
 from .serializers import (
-    EventSerializer, ParticipantSerializer, UserSerializer, 
-    CertificateSerializer, EventSessionSerializer, QuizSerializer, EvaluationQuestionSerializer
+    EventSerializer, EventSummarySerializer, ParticipantSerializer, UserSerializer, 
+    CertificateSerializer, EventSessionSerializer, QuizSerializer, EvaluationQuestionSerializer,
+    JobSerializer
+)
+from .utils import generate_certificate_pdf
+from .qr_cache import qr_image_response
+from .reports import (
+    stream_csv, attendance_csv_rows, evaluation_csv_rows, attendance_pdf_response, evaluation_analytics,
+    participation_summary, ATTENDANCE_CSV_HEADER, EVALUATION_CSV_HEADER, SUMMARY_GROUPS
 )
-from .utils import generate_certificate_pdf, send_certificate_email, generate_qr_code
 from .permissions import IsAdminOrReadOnly, IsAdmin, IsParticipantOrAdmin, is_admin
+from .jobs import enqueue
+from .checkin import check_in, check_in_batch
+from .caching import event_response, verification_response
+from .grading import answer_key, grade, regrade_event
+from .importers import import_participants, iter_upload_rows
+from .mailer import queue_certificate_emails
+from .profiling import store as profile_store
+from .pagination import EventCursorPagination, ParticipantCursorPagination, CertificateCursorPagination
+
+
+def boolean_flag(request, name, default):
+    """A boolean from the request body, or None if invalid; form clients send "false"/"0" as strings"""
+    try:
+        return serializers.BooleanField().to_internal_value(request.data.get(name, default))
+    except serializers.ValidationError:
+        return None
+
+
+def filter_eligible(queryset, request):
+    """Apply `?eligible=true|false` (certificate eligibility, decided in SQL)"""
+    eligible = request.query_params.get('eligible')
+    if eligible in ('true', 'false'):
+        queryset = queryset.eligible(eligible == 'true')
+    return queryset
 
 
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all().order_by('-date')
     serializer_class = EventSerializer
     permission_classes = [IsAdminOrReadOnly]  # Admins can CRUD, others read-only
+    pagination_class = EventCursorPagination
     
     def get_queryset(self):
         """Participants can only see events, admins see all"""
-        return Event.objects.all().order_by('-date')
+        queryset = Event.objects.all().order_by('-date')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('counters')
+            if not self.is_summary():
+                queryset = self.with_nested(queryset)
+        return queryset
+    
+    def is_summary(self):
+        """`?view=summary` returns events without their nested collections"""
+        return self.request.query_params.get('view') == 'summary'
+    
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve') and self.is_summary():
+            return EventSummarySerializer
+        return EventSerializer
+    
+    def visible_participants(self, queryset):
+        """Admins see every participant, participants see only their own"""
+        user = self.request.user
+        if not is_admin(user) and user and user.is_authenticated:
+            return queryset.filter(user=user)
+        return queryset
+    
+    def with_nested(self, queryset):
+        """Prefetch the nested collections EventSerializer renders.
+        
+        Keeps the query count fixed regardless of how many events or
+        participants are listed. The visible roster is prefetched into
+        `visible_participants` so the serializer does not re-filter per event.
+        """
+        participants = self.visible_participants(
+            Participant.objects.with_eligibility().select_related('certificate').prefetch_related('attendance_entries')
+        )
+        return queryset.prefetch_related(
+            'sessions',
+            'quizzes',
+            'evaluation_questions',
+            Prefetch('participants', queryset=participants, to_attr='visible_participants'),
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Event detail, cached per representation until the event changes"""
+        user = request.user
+        if self.is_summary():
+            variant = 'summary'
+        elif is_admin(user) or not user.is_authenticated:
+            variant = 'all'
+        else:
+            variant = f'user-{user.pk}'  # Roster filtered to the requester
+        return event_response(request, self.kwargs['pk'], variant,
+                              lambda: super(EventViewSet, self).retrieve(request, *args, **kwargs).data)
     
     def get_serializer_context(self):
         """Pass request to serializer for permission checks"""
@@ -68,46 +154,41 @@ class EventViewSet(viewsets.ModelViewSet):
         if user and not name:
             name = user.get_full_name() or user.first_name or user.username or 'Anonymous'
         
-        # Check if already registered - by user OR email
+        # Check if already registered by user
         existing = None
         if user:
-            # First check by user
             existing = Participant.objects.filter(
                 event=event,
                 user=user
             ).first()
         
-        # If not found by user, check by email
-        if not existing and email:
-            existing = Participant.objects.filter(
-                event=event,
-                email=email
-            ).first()
-        
         if existing:
-            # Update user if it wasn't set before
-            if user and not existing.user:
-                existing.user = user
-                existing.save()
             return Response(ParticipantSerializer(existing).data, status=status.HTTP_200_OK)
         
-        # Create new participant
+        # Create new participant; the (event, email) unique constraint rejects
+        # the insert if this email is already registered
         try:
-            participant = Participant.objects.create(
-                event=event,
-                user=user,
-                name=name if name else 'Anonymous',
-                email=email if email else '',
-                status='registered'
-            )
+            try:
+                with transaction.atomic():
+                    participant = Participant.objects.create(
+                        event=event,
+                        user=user,
+                        name=name if name else 'Anonymous',
+                        email=email if email else '',
+                        status='registered'
+                    )
+            except IntegrityError:
+                existing = Participant.objects.filter(event=event).with_email(email).first()
+                # Update user if it wasn't set before
+                if user and not existing.user:
+                    existing.user = user
+                    existing.save(update_fields=['user', 'updated_at'])
+                return Response(ParticipantSerializer(existing).data, status=status.HTTP_200_OK)
             
             # Refresh from database to ensure all fields are populated
+            # (participants_count is incremented by the Participant post_save receiver)
             participant.refresh_from_db()
             
-            # Update event participants count
-            event.participants_count = event.participants.count()
-            event.save()
-            
             # Return serialized participant with all fields
             serialized = ParticipantSerializer(participant).data
             return Response(serialized, status=status.HTTP_201_CREATED)
@@ -139,46 +220,92 @@ class EventViewSet(viewsets.ModelViewSet):
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Read file
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file)
-            else:
-                return Response({'error': 'Unsupported file format'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Expected columns: name, email (or Name, Email)
-            name_col = 'name' if 'name' in df.columns else 'Name'
-            email_col = 'email' if 'email' in df.columns else 'Email'
-            
-            if name_col not in df.columns or email_col not in df.columns:
-                return Response({'error': 'File must contain name and email columns'}, 
-                              status=status.HTTP_400_BAD_REQUEST)
-            
-            created = 0
-            for _, row in df.iterrows():
-                email = str(row[email_col]).strip()
-                name = str(row[name_col]).strip()
-                
-                if not email or '@' not in email:
-                    continue
-                
-                # Check if exists
-                if not Participant.objects.filter(event=event, email=email).exists():
-                    Participant.objects.create(
-                        event=event,
-                        name=name,
-                        email=email,
-                        status='registered'
-                    )
-                    created += 1
-            
-            event.participants_count = event.participants.count()
-            event.save()
-            
-            return Response({'message': f'{created} participants added', 'created': created})
+            result = import_participants(event, iter_upload_rows(file))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        skipped = result['skipped_existing'] + result['skipped_duplicate']
+        return Response({
+            'message': f"{result['created']} participants added",
+            'skipped': skipped,
+            **result,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def issue_certificates(self, request, pk=None):
+        """Issue certificates to every eligible participant (Admin only)"""
+        if not is_admin(request.user):
+            return Response({'error': 'Only administrators can issue certificates'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        event = self.get_object()
+        send_email = boolean_flag(request, 'send_email', True)
+        if send_email is None:
+            return Response({'error': 'send_email must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+        job = enqueue('issue_event_certificates', {
+            'event_id': event.id,
+            'send_email': send_email,
+        })
+        return Response({'message': 'Certificate issuance queued', 'job': JobSerializer(job).data},
+                        status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def resend_certificates(self, request, pk=None):
+        """Email the event's certificates again in batches (Admin only)
+
+        Body `{"only_unsent": true}` skips certificates whose last email was delivered.
+        """
+        if not is_admin(request.user):
+            return Response({'error': 'Only administrators can resend certificates'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        event = self.get_object()
+        certificates = Certificate.objects.filter(participant__event=event)
+        if request.data.get('only_unsent'):
+            certificates = certificates.exclude(email_status=Certificate.EMAIL_SENT)
+        certificate_ids = list(certificates.values_list('id', flat=True))
+        jobs = queue_certificate_emails(certificate_ids)
+        return Response({'message': 'Certificate emails queued', 'queued': len(certificate_ids),
+                         'jobs': JobSerializer(jobs, many=True).data},
+                        status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def regrade_quizzes(self, request, pk=None):
+        """Regrade every submitted quiz against the current questions (Admin only)"""
+        if not is_admin(request.user):
+            return Response({'error': 'Only administrators can regrade quizzes'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        event = self.get_object()
+        regraded, passed = regrade_event(event)
+        return Response({'regraded': regraded, 'passed': passed})
+    
+    @action(detail=True, methods=['get'])
+    def participants(self, request, pk=None):
+        """Paginated participant roster for an event; `?eligible=true|false` filters by certificate eligibility"""
+        event = self.get_object()
+        queryset = self.visible_participants(
+            event.participants.with_eligibility().select_related('certificate').prefetch_related('attendance_entries')
+        )
+        paginator = ParticipantCursorPagination()
+        page = paginator.paginate_queryset(filter_eligible(queryset, request), request, view=self)
+        serializer = ParticipantSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def eligibility(self, request, pk=None):
+        """Certificate eligibility counts for an event (Admin only)"""
+        if not is_admin(request.user):
+            return Response({'error': 'Only administrators can view eligibility'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        event = self.get_object()
+        eligible = Participant.objects.eligibility()
+        counts = event.participants.aggregate(
+            participants=Count('id'),
+            eligible=Count('id', filter=eligible),
+            certificates=Count('certificate'),
+            eligible_issued=Count('certificate', filter=eligible),
+        )
+        counts['ineligible'] = counts['participants'] - counts['eligible']
+        counts['pending'] = counts['eligible'] - counts.pop('eligible_issued')  # Eligible without a certificate yet
+        return Response(counts)
     
     @action(detail=True, methods=['get'])
     def qr_code(self, request, pk=None):
@@ -187,22 +314,29 @@ class EventViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only administrators can access QR codes'}, 
                           status=status.HTTP_403_FORBIDDEN)
         event = self.get_object()
-        qr_img = generate_qr_code(event.qr_code or f"EVENT-{event.id}", size=300)
-        return HttpResponse(qr_img.read(), content_type='image/png')
+        image_format = request.query_params.get('image_format', 'png')
+        if image_format not in ('png', 'svg'):
+            return Response({'error': 'image_format must be png or svg'}, status=status.HTTP_400_BAD_REQUEST)
+        return qr_image_response(request, event.qr_code or f"EVENT-{event.id}", size=300, fmt=image_format)
 
 
 class ParticipantViewSet(viewsets.ModelViewSet):
     queryset = Participant.objects.all()
     serializer_class = ParticipantSerializer
     permission_classes = [IsParticipantOrAdmin]
+    pagination_class = ParticipantCursorPagination
     
     def get_queryset(self):
         """Admins see all, participants see only their own"""
+        queryset = Participant.objects.select_related('event', 'certificate')
+        if self.action == 'list':
+            # Not annotated for the other actions: they change the row and re-serialize it
+            queryset = filter_eligible(queryset.with_eligibility(), self.request).prefetch_related('attendance_entries')
         if is_admin(self.request.user):
-            return Participant.objects.all()
+            return queryset
         # Participants can only see their own participant records
         if self.request.user and self.request.user.is_authenticated:
-            return Participant.objects.filter(user=self.request.user)
+            return queryset.filter(user=self.request.user)
         return Participant.objects.none()
     
     def get_serializer_context(self):
@@ -239,29 +373,33 @@ class ParticipantViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_403_FORBIDDEN)
         participant = self.get_object()
         check_type = request.data.get('type', 'in')  # 'in' or 'out'
+        session_id = request.data.get('session', None)
+        if session_id is not None:
+            try:
+                session_id = participant.event.sessions.get(pk=session_id).pk
+            except (EventSession.DoesNotExist, TypeError, ValueError):
+                return Response({'error': 'Session not found for this event'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
         
+        now = timezone.now()
         if check_type == 'in':
-            participant.check_in_time = timezone.now()
+            participant.check_in_time = now
             participant.status = 'attended'
-            # Add to attendance logs
-            logs = participant.attendance_logs or []
-            logs.append({
-                'type': 'check_in',
-                'time': timezone.now().isoformat(),
-                'session': request.data.get('session', None)
-            })
-            participant.attendance_logs = logs
+            fields = ['check_in_time', 'status', 'updated_at']
+            log_type = AttendanceLog.TYPE_CHECK_IN
         elif check_type == 'out':
-            participant.check_out_time = timezone.now()
-            logs = participant.attendance_logs or []
-            logs.append({
-                'type': 'check_out',
-                'time': timezone.now().isoformat(),
-                'session': request.data.get('session', None)
-            })
-            participant.attendance_logs = logs
-        
-        participant.save()
+            participant.check_out_time = now
+            fields = ['check_out_time', 'updated_at']
+            log_type = AttendanceLog.TYPE_CHECK_OUT
+        else:
+            return Response(ParticipantSerializer(participant).data)
+        
+        # Append a log row instead of rewriting the participant's whole history
+        with transaction.atomic():
+            participant.save(update_fields=fields)
+            AttendanceLog.objects.create(event_id=participant.event_id, participant=participant,
+                                         session_id=session_id, type=log_type, time=now,
+                                         scanned_by=request.user.username)
         return Response(ParticipantSerializer(participant).data)
     
     @action(detail=True, methods=['post'])
@@ -280,15 +418,19 @@ class ParticipantViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Event must be concluded before evaluation'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if already evaluated
-        if participant.has_evaluated:
-            return Response({'error': 'Evaluation already submitted'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
         evaluation_data = request.data.get('evaluation_data', {})
-        participant.evaluation_data = evaluation_data
-        participant.has_evaluated = True
-        participant.save()
+        if not isinstance(evaluation_data, dict):
+            return Response({'error': 'evaluation_data must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            # Check if already evaluated (locked, so a double submit is only tallied once)
+            if Participant.objects.select_for_update().filter(pk=participant.pk, has_evaluated=True).exists():
+                return Response({'error': 'Evaluation already submitted'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            participant.evaluation_data = evaluation_data
+            participant.has_evaluated = True
+            participant.save()
+            EvaluationTally.record(event.id, evaluation_data)
         
         return Response(ParticipantSerializer(participant).data)
     
@@ -304,51 +446,21 @@ class ParticipantViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_403_FORBIDDEN)
         
         answers = request.data.get('answers', {})
-        quizzes = Quiz.objects.filter(event=event).order_by('order')
-        
-        total_points = 0
-        max_points = sum(q.points for q in quizzes)
-        correct = 0
-        
-        quiz_results = {}
-        for quiz in quizzes:
-            user_answer = answers.get(str(quiz.id), '')
-            is_correct = str(user_answer).strip().lower() == str(quiz.correct_answer).strip().lower()
-            
-            if is_correct:
-                total_points += quiz.points
-                correct += 1
-            
-            quiz_results[quiz.id] = {
-                'question': quiz.question,
-                'user_answer': user_answer,
-                'correct_answer': quiz.correct_answer,
-                'is_correct': is_correct,
-                'points': quiz.points if is_correct else 0
-            }
-        
-        score = (total_points / max_points * 100) if max_points > 0 else 0
-        passed = score >= 70  # 70% passing grade
-        
-        participant.quiz_data = {
-            'answers': answers,
-            'results': quiz_results,
-            'score': score,
-            'total_points': total_points,
-            'max_points': max_points,
-            'correct': correct,
-            'passed': passed
-        }
-        participant.quiz_score = score
-        participant.quiz_passed = passed
-        participant.save()
+        if not isinstance(answers, dict):
+            return Response({'error': 'answers must be an object of {quiz_id: answer}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        quiz_data = grade(answer_key(event), answers)
+        participant.quiz_data = quiz_data
+        participant.quiz_score = quiz_data['score']
+        participant.quiz_passed = quiz_data['passed']
+        participant.save(update_fields=['quiz_data', 'quiz_score', 'quiz_passed', 'updated_at'])
         
         return Response({
-            'score': score,
-            'passed': passed,
-            'total_points': total_points,
-            'max_points': max_points,
-            'correct': correct,
+            'score': quiz_data['score'],
+            'passed': quiz_data['passed'],
+            'total_points': quiz_data['total_points'],
+            'max_points': quiz_data['max_points'],
+            'correct': quiz_data['correct'],
             'participant': ParticipantSerializer(participant).data
         })
     
@@ -359,6 +471,9 @@ class ParticipantViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only administrators can issue certificates'}, 
                           status=status.HTTP_403_FORBIDDEN)
         participant = self.get_object()
+        send_email = boolean_flag(request, 'send_email', True)
+        if send_email is None:
+            return Response({'error': 'send_email must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check eligibility
         if not participant.is_eligible_for_certificate():
@@ -368,33 +483,18 @@ class ParticipantViewSet(viewsets.ModelViewSet):
         # Check if certificate already exists
         cert, created = Certificate.objects.get_or_create(participant=participant)
         
-        # Always regenerate and save PDF (in case it was deleted or needs update)
-        # Generate PDF
-        pdf_buffer = generate_certificate_pdf(cert)
-        pdf_buffer.seek(0)
-        
-        # Save PDF file to Django storage
-        from django.core.files.base import ContentFile
-        pdf_content = pdf_buffer.read()
-        pdf_buffer.seek(0)
-        
-        cert.pdf_file.save(
-            f'certificate_{cert.certificate_number}.pdf',
-            ContentFile(pdf_content),
-            save=True
-        )
-        
-        # Send email if requested and not already sent
-        if created:
-            send_email = request.data.get('send_email', True)
-            if send_email and not cert.emailed:
-                send_certificate_email(cert)
+        # Rendering the PDF and sending the email happen in the job worker;
+        # the PDF is always regenerated in case it was deleted or needs update
+        send_email = created and send_email and not cert.emailed
+        job = enqueue('render_certificate', {'certificate_id': cert.id, 'send_email': send_email})
         
         # Update participant status to completed
         participant.status = 'completed'
         participant.save()
         
-        return Response(CertificateSerializer(cert).data)
+        data = CertificateSerializer(cert).data
+        data['job'] = JobSerializer(job).data
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['POST'])
@@ -434,6 +534,18 @@ def me(request):
     return Response({'user': UserSerializer(request.user).data})
 
 
+@api_view(['GET'])
+def my_qr_code(request):
+    """QR code image for the current user's attendance code"""
+    if not request.user or not request.user.is_authenticated:
+        return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    image_format = request.query_params.get('image_format', 'png')
+    if image_format not in ('png', 'svg'):
+        return Response({'error': 'image_format must be png or svg'}, status=status.HTTP_400_BAD_REQUEST)
+    return qr_image_response(request, profile.qr_code, fmt=image_format)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def register_view(request):
@@ -468,10 +580,11 @@ class CertificateViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Certificate.objects.all()
     serializer_class = CertificateSerializer
     permission_classes = [IsParticipantOrAdmin]
+    pagination_class = CertificateCursorPagination
     
     def get_queryset(self):
         """Admins see all, participants see only their own certificates"""
-        queryset = Certificate.objects.all()
+        queryset = Certificate.objects.select_related('participant__event')
         
         # Filter by participant if query param provided
         participant_id = self.request.query_params.get('participant', None)
@@ -507,28 +620,50 @@ class CertificateViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Only administrators can resend certificates'}, 
                           status=status.HTTP_403_FORBIDDEN)
         certificate = self.get_object()
-        success = send_certificate_email(certificate)
-        if success:
-            return Response({'message': 'Email sent successfully'})
-        return Response({'error': 'Failed to send email'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        job, = queue_certificate_emails([certificate.id])
+        return Response({'message': 'Email queued', 'job': JobSerializer(job).data},
+                        status=status.HTTP_202_ACCEPTED)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def verify(self, request):
         """Verify certificate by verification code"""
         code = request.query_params.get('code')
         if not code:
             return Response({'error': 'Verification code required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            cert = Certificate.objects.get(verification_code=code)
-            return Response({
+        def build():
+            cert = (Certificate.objects.filter(verification_code=code)
+                    .select_related('participant__event').first())
+            if cert is None:
+                return None, {'valid': False, 'error': 'Invalid verification code'}
+            participant, event = cert.participant, cert.participant.event
+            # Only what a verifier needs, not the event's whole roster
+            return event.id, {
                 'valid': True,
-                'certificate': CertificateSerializer(cert).data,
-                'participant': ParticipantSerializer(cert.participant).data,
-                'event': EventSerializer(cert.participant.event).data
-            })
-        except Certificate.DoesNotExist:
-            return Response({'valid': False, 'error': 'Invalid verification code'})
+                'certificate': {
+                    'certificate_number': cert.certificate_number,
+                    'verification_code': cert.verification_code,
+                    'issued_at': cert.issued_at,
+                },
+                'participant': {'name': participant.name, 'status': participant.status},
+                'event': {
+                    'id': event.id,
+                    'title': event.title,
+                    'date': event.date,
+                    'time_start': event.time_start,
+                    'time_end': event.time_end,
+                    'location': event.location,
+                },
+            }
+        
+        return verification_response(request, code, build)
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Background job status (Admin only)"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAdmin]
 
 
 @api_view(['GET'])
@@ -537,78 +672,18 @@ def reports_attendance(request, event_id):
     """Generate attendance report (Admin only)"""
     try:
         event = Event.objects.get(id=event_id)
-        participants = Participant.objects.filter(event=event)
-        
-        data = []
-        for p in participants:
-            data.append({
-                'Name': p.name,
-                'Email': p.email,
-                'Status': p.status,
-                'Check In': p.check_in_time.strftime('%Y-%m-%d %H:%M:%S') if p.check_in_time else '',
-                'Check Out': p.check_out_time.strftime('%Y-%m-%d %H:%M:%S') if p.check_out_time else '',
-                'Has Evaluated': 'Yes' if p.has_evaluated else 'No',
-                'Quiz Passed': 'Yes' if p.quiz_passed else 'No'
-            })
-        
-        df = pd.DataFrame(data)
         
         format_type = request.query_params.get('format', 'csv')
         if format_type == 'csv':
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            response = HttpResponse(output.getvalue(), content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="attendance_report_{event_id}.csv"'
-            return response
+            return stream_csv(ATTENDANCE_CSV_HEADER, attendance_csv_rows(event),
+                              f'attendance_report_{event_id}.csv')
         else:
-            # PDF report
-            from reportlab.lib.pagesizes import letter  # type: ignore
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle  # type: ignore
-            from reportlab.lib import colors  # type: ignore
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = []
-            
-            # Title
-            from reportlab.platypus import Paragraph  # type: ignore
-            from reportlab.lib.styles import getSampleStyleSheet  # type: ignore
-            styles = getSampleStyleSheet()
-            elements.append(Paragraph(f"Attendance Report: {event.title}", styles['Title']))
-            elements.append(Paragraph(f"Date: {event.date}", styles['Normal']))
-            elements.append(Paragraph("", styles['Normal']))  # Spacer
-            
-            # Table
-            table_data = [['Name', 'Email', 'Status', 'Check In', 'Check Out', 'Evaluated', 'Quiz']]
-            for p in participants:
-                table_data.append([
-                    p.name,
-                    p.email,
-                    p.status,
-                    p.check_in_time.strftime('%H:%M') if p.check_in_time else '-',
-                    p.check_out_time.strftime('%H:%M') if p.check_out_time else '-',
-                    'Yes' if p.has_evaluated else 'No',
-                    'Yes' if p.quiz_passed else 'No'
-                ])
-            
-            table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer.read(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="attendance_report_{event_id}.pdf"'
-            return response
+            # PDF report; ?view=summary leaves out the per-participant table
+            return attendance_pdf_response(
+                event,
+                f'attendance_report_{event_id}.pdf',
+                summary_only=request.query_params.get('view') == 'summary'
+            )
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -621,28 +696,46 @@ def reports_evaluation(request, event_id):
     """Generate evaluation report (Admin only)"""
     try:
         event = Event.objects.get(id=event_id)
-        participants = Participant.objects.filter(event=event, has_evaluated=True)
-        
-        data = []
-        for p in participants:
-            eval_data = p.evaluation_data or {}
-            data.append({
-                'Name': p.name,
-                'Email': p.email,
-                'Rating': eval_data.get('rating', 'N/A'),
-                'Instructor Rating': eval_data.get('instructorRating', 'N/A'),
-                'Comments': eval_data.get('comments', ''),
-                'Submitted At': p.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        df = pd.DataFrame(data)
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="evaluation_report_{event_id}.csv"'
-        return response
+        return stream_csv(EVALUATION_CSV_HEADER, evaluation_csv_rows(event),
+                          f'evaluation_report_{event_id}.csv')
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def reports_evaluation_analytics(request, event_id):
+    """Per-question evaluation statistics (Admin only)"""
+    try:
+        event = Event.objects.get(id=event_id)
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(evaluation_analytics(event))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def reports_summary(request):
+    """Cross-event participation summary by month and location (Admin only)
+
+    Query parameters: from, to (YYYY-MM-DD, event dates, inclusive), location,
+    group_by (month, location or month,location).
+    """
+    dates = {}
+    for name in ('from', 'to'):
+        value = request.query_params.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            return Response({'error': f'{name} must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+    group_by = [field for field in request.query_params.get('group_by', ','.join(SUMMARY_GROUPS)).split(',') if field]
+    if not group_by or set(group_by) - set(SUMMARY_GROUPS) or len(set(group_by)) != len(group_by):
+        return Response({'error': 'group_by must be month, location or month,location'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response(participation_summary(dates['from'], dates['to'],
+                                          request.query_params.get('location'), group_by))
 
 
 @api_view(['POST'])
@@ -658,83 +751,48 @@ def scan_qr_code(request):
     if not event_id:
         return Response({'error': 'Event ID required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        event = Event.objects.get(id=event_id)
-    except Event.DoesNotExist:
-        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
-    
     # Parse QR code format: USER-{user_id}-{code}
     if qr_data.startswith('USER-'):
-        # User QR code - find user by QR code
         try:
-            profile = UserProfile.objects.get(qr_code=qr_data)
-            user = profile.user
-            
-            # Find or create participant for this event
-            participant, created = Participant.objects.get_or_create(
-                event=event,
-                user=user,
-                defaults={
-                    'name': user.get_full_name() or user.first_name or user.username,
-                    'email': user.email,
-                    'status': 'registered'
-                }
-            )
-            
-            # If participant already exists, update name/email if needed
-            if not created:
-                if not participant.name or participant.name == 'Anonymous':
-                    participant.name = user.get_full_name() or user.first_name or user.username
-                if not participant.email:
-                    participant.email = user.email
-            
-            # Mark attendance
-            participant.check_in_time = timezone.now()
-            participant.status = 'attended'
-            logs = participant.attendance_logs or []
-            logs.append({
-                'type': 'check_in',
-                'time': timezone.now().isoformat(),
-                'scanned_by': 'admin',
-                'qr_code': qr_data
-            })
-            participant.attendance_logs = logs
-            participant.save()
-            
-            # Update event participants count
-            event.participants_count = event.participants.count()
-            event.save()
-            
-            return Response({
-                'success': True,
-                'participant': ParticipantSerializer(participant).data,
-                'user': UserSerializer(user).data,
-                'message': f'{participant.name} marked as present'
-            })
-        except UserProfile.DoesNotExist:
+            result = check_in(int(event_id), qr_data)
+        except (Event.DoesNotExist, TypeError, ValueError):
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        if result is None:
             return Response({'error': 'User not found for this QR code'}, 
                           status=status.HTTP_404_NOT_FOUND)
+        
+        # Compact payload: scanners only need who was checked in
+        return Response({
+            'success': True,
+            'participant': {
+                'id': result.participant_id,
+                'name': result.name,
+                'status': result.status,
+                'check_in_time': result.check_in_time,
+            },
+            'user_id': result.user_id,
+            'message': f'{result.name} marked as present'
+        })
+    
+    try:
+        event = Event.objects.get(id=event_id)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
     
     # Legacy support: EVENT-{event_id}-{code} format
-    elif qr_data.startswith('EVENT-'):
+    if qr_data.startswith('EVENT-'):
         # Event QR code - find participant by email or ID
         participant_email = request.data.get('participant_email')
         if participant_email:
-            participant = Participant.objects.filter(
-                event=event, email=participant_email
-            ).first()
+            participant = Participant.objects.filter(event=event).with_email(participant_email).first()
             
             if participant:
                 participant.check_in_time = timezone.now()
                 participant.status = 'attended'
-                logs = participant.attendance_logs or []
-                logs.append({
-                    'type': 'check_in',
-                    'time': timezone.now().isoformat(),
-                    'scanned_by': 'admin'
-                })
-                participant.attendance_logs = logs
-                participant.save()
+                with transaction.atomic():
+                    participant.save(update_fields=['check_in_time', 'status', 'updated_at'])
+                    AttendanceLog.objects.create(event=event, participant=participant,
+                                                 time=participant.check_in_time, scanned_by='admin')
                 
                 return Response({
                     'success': True,
@@ -744,3 +802,40 @@ def scan_qr_code(request):
     
     return Response({'error': 'Invalid QR code format or participant not found'}, 
                   status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def scan_qr_batch(request):
+    """Sync scans queued by an offline kiosk (admin-only)"""
+    scans = request.data.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return Response({'error': 'scans must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    max_size = getattr(settings, 'SCAN_BATCH_MAX_SIZE', 1000)
+    if len(scans) > max_size:
+        return Response({'error': f'At most {max_size} scans per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    results = check_in_batch(scans)
+    counts = Counter(result['status'] for result in results)
+    return Response({
+        'success': True,
+        'checked_in': counts['checked_in'],
+        'duplicates': counts['duplicate'],
+        'failed': counts['not_found'] + counts['invalid'],
+        'results': results,
+    })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    """Per-view latency and query profile of this process (admin-only); DELETE clears it"""
+    if request.method == 'DELETE':
+        profile_store.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'enabled': settings.PROFILING_ENABLED,
+        'window': settings.PROFILING_WINDOW,
+        'views': profile_store.summary(),
+    })
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from .database import database_from_url
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get('DJANGO_SECRET', 'dev-secret-key')
@@ -23,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.RequestProfilingMiddleware',  # No-op unless PROFILING_ENABLED
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,13 +56,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'vpaaproject.wsgi.application'
 
+# Database from DATABASE_URL (postgres://... or sqlite:///...); defaults to db.sqlite3 here
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))  # Seconds to keep PostgreSQL connections open
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'  # psycopg connection pool (replaces DB_CONN_MAX_AGE)
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))  # Per worker process
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_url(
+        DATABASE_URL, BASE_DIR,
+        conn_max_age=DB_CONN_MAX_AGE,
+        pool={'min_size': DB_POOL_MIN_SIZE, 'max_size': DB_POOL_MAX_SIZE, 'timeout': DB_POOL_TIMEOUT} if DB_POOL else None,
+    )
 }
 
+# SQLite pragmas applied to every new connection (api/models.py); WAL lets reads run during writes
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'))  # Milliseconds to wait for the write lock
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -82,7 +99,67 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Keyset pagination; each viewset picks its own ordering in api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', '100')),
+    # Reports take ?format=csv|pdf themselves; don't let DRF treat it as a renderer override
+    'URL_FORMAT_OVERRIDE': None,
+}
+
+# Upper bound for the `?page_size=` query parameter
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '1000'))
+
+# Background jobs (api/jobs.py, processed by `python manage.py run_jobs`)
+JOBS_EAGER = os.environ.get('JOBS_EAGER', '0') == '1'  # Run jobs inline in the request (no worker)
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', '2'))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', '5'))
+JOBS_RETRY_BACKOFF = int(os.environ.get('JOBS_RETRY_BACKOFF', '30'))  # Seconds, doubled per attempt
+JOBS_RETRY_MAX_DELAY = int(os.environ.get('JOBS_RETRY_MAX_DELAY', '3600'))
+JOBS_STALE_TIMEOUT = int(os.environ.get('JOBS_STALE_TIMEOUT', '600'))  # Requeue jobs stuck in 'running'
+JOBS_REQUEUE_INTERVAL = int(os.environ.get('JOBS_REQUEUE_INTERVAL', '60'))  # Seconds between stale-job sweeps
+
+# Outgoing mail for certificates (api/mailer.py). Any Django EMAIL_BACKEND works: the console
+# or file backend for testing; with SENDGRID_API_KEY set, SMTP defaults to SendGrid's relay
+SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.sendgrid.net' if SENDGRID_API_KEY else 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587' if SENDGRID_API_KEY else '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'apikey' if SENDGRID_API_KEY else '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', SENDGRID_API_KEY)
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1' if SENDGRID_API_KEY else '0') == '1'
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '30'))  # Seconds per SMTP operation
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))  # File backend output
+DEFAULT_FROM_EMAIL = os.environ.get('EMAIL_FROM') or os.environ.get('SENDGRID_FROM_EMAIL') or 'noreply@vpaa.edu'
+CERTIFICATE_EMAIL_BATCH_SIZE = int(os.environ.get('CERTIFICATE_EMAIL_BATCH_SIZE', '100'))  # Messages per job/connection
+CERTIFICATE_EMAIL_RATE = float(os.environ.get('CERTIFICATE_EMAIL_RATE', '10'))  # Per second across all workers; 0 = unpaced
+
+# Processes used to render PDFs in batch certificate issuance (default: all cores)
+CERTIFICATE_RENDER_WORKERS = int(os.environ.get('CERTIFICATE_RENDER_WORKERS', '0')) or None
+
+# Response cache for event detail and certificate verification (api/caching.py).
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'vpaa'),
+    }
 }
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '60'))  # Seconds; bounds staleness across workers
+
+# QR image cache (api/qr_cache.py): in-process LRU entries plus an optional shared disk layer
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', '1024'))
+QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR') or None
+
+# QR check-in index (api/checkin.py): events kept in memory and seconds before a rebuild
+CHECKIN_INDEX_EVENTS = int(os.environ.get('CHECKIN_INDEX_EVENTS', '32'))
+CHECKIN_INDEX_TTL = int(os.environ.get('CHECKIN_INDEX_TTL', '300'))
+SCAN_BATCH_MAX_SIZE = int(os.environ.get('SCAN_BATCH_MAX_SIZE', '1000'))  # Scans per offline sync request
+
+# Request profiling (api/profiling.py): Server-Timing headers and /api/metrics/
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILING_WINDOW = int(os.environ.get('PROFILING_WINDOW', '1000'))  # Recent samples kept per view
+PROFILING_SLOW_QUERY_MS = float(os.environ.get('PROFILING_SLOW_QUERY_MS', '100'))  # Log statements slower than this
+PROFILING_NPLUSONE_THRESHOLD = int(os.environ.get('PROFILING_NPLUSONE_THRESHOLD', '10'))  # Identical statements per request
 
 # Allow CORS from the frontend dev server (vite on port 5000) and any origin for now
 CORS_ALLOW_ALL_ORIGINS = True